@@ -33,6 +33,10 @@ class BaseMiddleware(metaclass=Singleton):
     def publish_raw(self, message_type, topic, payload):
         self._transport.publish_raw(message_type, topic, payload)
 
+    def publish_many(self, messages):
+        for message_type, topic, payload in messages:
+            self._transport.publish_raw(message_type, topic, payload)
+
     def subscribe_raw(self, message_type, topic, callback):
         self._transport.subscribe_raw(message_type, topic, callback)
 
@@ -70,6 +74,15 @@ class KafkaMiddleware(BaseMiddleware):
     def __init__(self):
         super().__init__(middleware.KafkaMiddleware(), middleware.KafkaSerializer())
 
+    def publish_many(self, messages, producer_config=None):
+        self._transport.publish_many(messages, producer_config)
+
+    def subscribe_all_raw(self, topics, callback, consumer_config=None):
+        self._transport.subscribe_all_raw(topics, callback, consumer_config)
+
+    def flush(self, timeout_ms=5000):
+        self._transport.flush(timeout_ms)
+
 
 class DDSMiddleware(BaseMiddleware):
     def __init__(self):
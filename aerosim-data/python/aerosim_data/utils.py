@@ -10,24 +10,28 @@ def dict_to_namespace(d):
 
 
 def flatten_to_dict(dict_or_namespace: dict | SimpleNamespace):
-    flat_dict = {}
+    if not isinstance(dict_or_namespace, (dict, SimpleNamespace)):
+        raise ValueError("Input must be a dictionary or SimpleNamespace")
 
-    def flatten(d, parent_key=""):
-        if not isinstance(d, (dict, SimpleNamespace)):
-            raise ValueError("Input must be a dictionary or SimpleNamespace")
+    if isinstance(dict_or_namespace, SimpleNamespace):
+        dict_or_namespace = dict_or_namespace.__dict__
 
-        if isinstance(d, SimpleNamespace):
-            d = d.__dict__
+    flat_dict = {}
 
-        for k, v in d.items():
+    # Walk the nested dicts depth-first with an explicit stack of item iterators,
+    # which keeps the keys in the same order as the nesting
+    stack = [("", iter(dict_or_namespace.items()))]
+    while stack:
+        parent_key, items = stack[-1]
+        for k, v in items:
             if isinstance(v, SimpleNamespace):
                 v = v.__dict__
 
             if isinstance(v, dict):
-                flatten(v, parent_key + k + ".")
-            else:
-                flat_dict[parent_key + k] = v
-
-    flatten(dict_or_namespace)
+                stack.append((parent_key + k + ".", iter(v.items())))
+                break
+            flat_dict[parent_key + k] = v
+        else:
+            stack.pop()
 
     return flat_dict
@@ -38,6 +38,14 @@ impl Metadata {
         }
     }
 
+    /// Reuse this metadata for a new message by replacing the simulation time and
+    /// refreshing the platform time.
+    #[pyo3(signature = (timestamp_sim=None))]
+    pub fn update_timestamps(&mut self, timestamp_sim: Option<TimeStamp>) {
+        self.timestamp_sim = timestamp_sim.unwrap_or(TimeStamp::new(SENTINEL_SECONDS, 0));
+        self.timestamp_platform = TimeStamp::now();
+    }
+
     pub fn is_sim_time_valid(&self) -> bool {
         self.timestamp_sim.sec >= 0
     }
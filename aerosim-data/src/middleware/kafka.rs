@@ -1,4 +1,5 @@
 use std::{
+    collections::HashMap,
     error::Error,
     sync::{Arc, Mutex, OnceLock},
     time::Duration,
@@ -7,13 +8,13 @@ use std::{
 use async_trait::async_trait;
 use bincode;
 use futures_util::StreamExt;
-use pyo3::prelude::*;
+use pyo3::{exceptions::PyRuntimeError, prelude::*};
 use rdkafka::{
     admin::{AdminClient, AdminOptions, NewTopic, TopicReplication},
     client::DefaultClientContext,
     consumer::{Consumer, StreamConsumer},
     message::Message,
-    producer::{FutureProducer, FutureRecord},
+    producer::{FutureProducer, FutureRecord, Producer},
     ClientConfig, TopicPartitionList,
 };
 use serde::{Deserialize, Serialize};
@@ -71,6 +72,9 @@ pub struct KafkaMiddleware {
     // Temporary producer with specific settings for image publishing.  
     // This setup will remain in place until a configurable producer interface is provided to the user.
     image_producer: OnceLock<Arc<FutureProducer>>,
+    // Producers with librdkafka settings that override the defaults, keyed by the
+    // sorted overrides, so that publishers with the same settings share one.
+    tuned_producers: Mutex<HashMap<Vec<(String, String)>, Arc<FutureProducer>>>,
 }
 
 impl KafkaMiddleware {
@@ -81,11 +85,190 @@ impl KafkaMiddleware {
             producer: OnceLock::new(),
             consumers: Mutex::new(Vec::new()),
             image_producer: OnceLock::new(),
+            tuned_producers: Mutex::new(HashMap::new()),
         }
     }
 }
 
 impl KafkaMiddleware {
+    // Temporary image producer with specific settings to improve performance.
+    fn get_producer(&self, message_type: &str) -> Arc<FutureProducer> {
+        match message_type {
+            "aerosim::types::CompressedImage" => Arc::clone(self.image_producer.get_or_init(|| {
+                Arc::new(
+                    ClientConfig::new()
+                        .set("bootstrap.servers", "127.0.0.1:9092")
+                        .set("broker.address.family", "v4")
+                        .set("linger.ms", "0") // disable batching, send msgs immediately to improve latency
+                        .set("message.timeout.ms", "5000")
+                        .set("acks", "0")
+                        .set("compression.type", "none")
+                        .set("message.max.bytes", "10000000")
+                        .set("debug", "all")
+                        .create()
+                        .expect("Couldn't create Kafka producer."),
+                )
+            })),
+            _ => Arc::clone(
+                self.producer
+                    .get_or_init(|| Arc::new(Self::create_producer(&[]))),
+            ),
+        }
+    }
+
+    fn create_producer(overrides: &[(String, String)]) -> FutureProducer {
+        let mut config = ClientConfig::new();
+        config
+            .set("bootstrap.servers", "127.0.0.1:9092")
+            .set("broker.address.family", "v4")
+            .set("socket.nagle.disable", "true") // to improve latency perf for many small msgs
+            .set("linger.ms", "0") // disable batching, send msgs immediately to improve latency
+            .set("message.timeout.ms", "5000")
+            .set("enable.idempotence", "true")
+            .set("acks", "all")
+            .set("compression.type", "none");
+        for (key, value) in overrides {
+            config.set(key, value);
+        }
+        config.create().expect("Couldn't create Kafka producer.")
+    }
+
+    // Producer for non-image messages with librdkafka settings that override the
+    // defaults, only used by the publishers that ask for these settings
+    fn get_tuned_producer(&self, producer_config: &HashMap<String, String>) -> Arc<FutureProducer> {
+        let mut overrides: Vec<(String, String)> = producer_config
+            .iter()
+            .map(|(key, value)| (key.clone(), value.clone()))
+            .collect();
+        overrides.sort();
+        let mut tuned_producers = self.tuned_producers.lock().unwrap();
+        let producer = tuned_producers
+            .entry(overrides)
+            .or_insert_with_key(|overrides| Arc::new(Self::create_producer(overrides)));
+        Arc::clone(producer)
+    }
+
+    // Subscribe with librdkafka settings that override the consumer defaults for
+    // this subscription only
+    async fn subscribe_all_raw_with_config(
+        &self,
+        topics: Vec<(String, String)>,
+        callback: CallbackClosureRaw,
+        consumer_config: &HashMap<String, String>,
+    ) -> Result<(), Box<dyn Error>> {
+        let mut config = ClientConfig::new();
+        config
+            .set("bootstrap.servers", "127.0.0.1:9092")
+            .set("broker.address.family", "v4")
+            .set("socket.nagle.disable", "true") // to improve latency perf for many small msgs
+            .set("group.id", "aerosim.simcore")
+            .set("client.id", "aerosim.simcore")
+            .set("enable.partition.eof", "true")
+            .set("enable.auto.commit", "false")
+            .set("auto.offset.reset", "latest")
+            .set("message.max.bytes", "10000000")
+            .set("fetch.message.max.bytes", "10000000");
+        for (key, value) in consumer_config {
+            config.set(key, value);
+        }
+        let consumer: Arc<StreamConsumer> =
+            Arc::new(config.create().expect("Couldn't create Kafka subscriber."));
+
+        // Create missing topics in the Kafka broker.
+        self.create_topics(&topics).await;
+
+        {
+            let consumer = Arc::clone(&consumer);
+
+            let mut tpl = TopicPartitionList::new();
+            for (_, topic) in &topics {
+                tpl.add_partition_offset(&topic, 0, rdkafka::Offset::Beginning)
+                    .expect("[aerosim.middleware.kafka] Error adding partition offset");
+            }
+
+            for ((topic, partition), _) in tpl.to_topic_map() {
+                let high_offset =
+                    match consumer.fetch_watermarks(&topic, partition, Duration::from_millis(5000))
+                    {
+                        Ok((_, high_offset)) => high_offset,
+                        Err(rdkafka::error::KafkaError::MetadataFetch(
+                            rdkafka::types::RDKafkaErrorCode::UnknownPartition,
+                        )) => 0,
+                        Err(_) => -1,
+                    };
+
+                if high_offset >= 0 {
+                    tpl.set_partition_offset(
+                        &topic,
+                        partition,
+                        rdkafka::Offset::Offset(high_offset),
+                    )
+                    .expect("[aerosim.middleware.kafka] Error setting partition offset");
+                }
+            }
+
+            consumer
+                .assign(&tpl)
+                .expect("[aerosim.middleware.kafka] Error assigning topics");
+
+            task::spawn(async move {
+                let mut stream = consumer.stream();
+                while let Some(result) = stream.next().await {
+                    match result {
+                        Ok(sample) => match sample.payload() {
+                            Some(payload) => {
+                                let _ = callback(payload);
+                            }
+                            None => println!(
+                                "Couldn't extract payload from sample ({})",
+                                sample.topic()
+                            ),
+                        },
+                        Err(_) => {}
+                    }
+                }
+            });
+        }
+
+        {
+            let mut consumers = self.consumers.lock().unwrap();
+            consumers.push(consumer);
+        }
+
+        Ok(())
+    }
+
+    async fn publish_many(
+        &self,
+        messages: &[(&str, &str, &[u8])],
+        producer_config: &HashMap<String, String>,
+    ) {
+        let tuned_producer =
+            (!producer_config.is_empty()).then(|| self.get_tuned_producer(producer_config));
+        // Enqueue every record before awaiting any delivery report, so librdkafka
+        // can batch the records of one burst together
+        let deliveries = messages.iter().map(|&(message_type, topic, payload)| {
+            let producer = match &tuned_producer {
+                Some(producer) if message_type != "aerosim::types::CompressedImage" => {
+                    Arc::clone(producer)
+                }
+                _ => self.get_producer(message_type),
+            };
+            async move {
+                if let Err(e) = producer
+                    .send(
+                        FutureRecord::to(topic).key("key").payload(payload),
+                        Duration::from_secs(0),
+                    )
+                    .await
+                {
+                    println!("Failed to publish topic {} with error: {:?}", topic, e.0);
+                }
+            }
+        });
+        futures::future::join_all(deliveries).await;
+    }
+
     async fn create_topics(&self, topics: &Vec<(String, String)>) {
         let admin = self.admin.get_or_init(|| {
             ClientConfig::new()
@@ -160,39 +343,7 @@ impl MiddlewareRaw for KafkaMiddleware {
         //     )
         // }));
         
-        // Temporary image producer with specific settings to improve performance.
-        let producer = match _message_type {
-            "aerosim::types::CompressedImage" => Arc::clone(self.image_producer.get_or_init(|| {
-                Arc::new(
-                    ClientConfig::new()
-                        .set("bootstrap.servers", "127.0.0.1:9092")
-                        .set("broker.address.family", "v4")
-                        .set("linger.ms", "0") // disable batching, send msgs immediately to improve latency
-                        .set("message.timeout.ms", "5000")
-                        .set("acks", "0")
-                        .set("compression.type", "none")
-                        .set("message.max.bytes", "10000000")
-                        .set("debug", "all")
-                        .create()
-                        .expect("Couldn't create Kafka producer."),
-                )
-            })),
-            _ => Arc::clone(self.producer.get_or_init(|| {
-                Arc::new(
-                    ClientConfig::new()
-                        .set("bootstrap.servers", "127.0.0.1:9092")
-                        .set("broker.address.family", "v4")
-                        .set("socket.nagle.disable", "true") // to improve latency perf for many small msgs
-                        .set("linger.ms", "0") // disable batching, send msgs immediately to improve latency
-                        .set("message.timeout.ms", "5000")
-                        .set("enable.idempotence", "true")
-                        .set("acks", "all")
-                        .set("compression.type", "none")
-                        .create()
-                        .expect("Couldn't create Kafka producer."),
-                )
-            })),
-        };
+        let producer = self.get_producer(_message_type);
         match producer
             .send(
                 FutureRecord::to(topic).key("key").payload(payload),
@@ -225,84 +376,8 @@ impl MiddlewareRaw for KafkaMiddleware {
         topics: Vec<(String, String)>,
         callback: CallbackClosureRaw,
     ) -> Result<(), Box<dyn Error>> {
-        let consumer: Arc<StreamConsumer> = Arc::new(
-            ClientConfig::new()
-                .set("bootstrap.servers", "127.0.0.1:9092")
-                .set("broker.address.family", "v4")
-                .set("socket.nagle.disable", "true") // to improve latency perf for many small msgs
-                .set("group.id", "aerosim.simcore")
-                .set("client.id", "aerosim.simcore")
-                .set("enable.partition.eof", "true")
-                .set("enable.auto.commit", "false")
-                .set("auto.offset.reset", "latest")
-                .set("message.max.bytes", "10000000")
-                .set("fetch.message.max.bytes", "10000000")
-                .create()
-                .expect("Couldn't create Kafka subscriber."),
-        );
-
-        // Create missing topics in the Kafka broker.
-        self.create_topics(&topics).await;
-
-        {
-            let consumer = Arc::clone(&consumer);
-
-            let mut tpl = TopicPartitionList::new();
-            for (_, topic) in &topics {
-                tpl.add_partition_offset(&topic, 0, rdkafka::Offset::Beginning)
-                    .expect("[aerosim.middleware.kafka] Error adding partition offset");
-            }
-
-            for ((topic, partition), _) in tpl.to_topic_map() {
-                let high_offset =
-                    match consumer.fetch_watermarks(&topic, partition, Duration::from_millis(5000))
-                    {
-                        Ok((_, high_offset)) => high_offset,
-                        Err(rdkafka::error::KafkaError::MetadataFetch(
-                            rdkafka::types::RDKafkaErrorCode::UnknownPartition,
-                        )) => 0,
-                        Err(_) => -1,
-                    };
-
-                if high_offset >= 0 {
-                    tpl.set_partition_offset(
-                        &topic,
-                        partition,
-                        rdkafka::Offset::Offset(high_offset),
-                    )
-                    .expect("[aerosim.middleware.kafka] Error setting partition offset");
-                }
-            }
-
-            consumer
-                .assign(&tpl)
-                .expect("[aerosim.middleware.kafka] Error assigning topics");
-
-            task::spawn(async move {
-                let mut stream = consumer.stream();
-                while let Some(result) = stream.next().await {
-                    match result {
-                        Ok(sample) => match sample.payload() {
-                            Some(payload) => {
-                                let _ = callback(payload);
-                            }
-                            None => println!(
-                                "Couldn't extract payload from sample ({})",
-                                sample.topic()
-                            ),
-                        },
-                        Err(_) => {}
-                    }
-                }
-            });
-        }
-
-        {
-            let mut consumers = self.consumers.lock().unwrap();
-            consumers.push(consumer);
-        }
-
-        Ok(())
+        self.subscribe_all_raw_with_config(topics, callback, &HashMap::new())
+            .await
     }
 }
 
@@ -370,7 +445,63 @@ impl KafkaMiddleware {
         topic: &str,
         payload: Py<pyo3::types::PyBytes>,
     ) -> PyResult<()> {
-        futures::executor::block_on(self.pypublish_raw_impl(py, message_type, topic, payload))
+        // Waiting for the delivery report doesn't need the GIL, so let other Python
+        // threads run meanwhile
+        let payload = payload.as_bytes(py);
+        py.allow_threads(|| {
+            futures::executor::block_on(self.publish_raw(message_type, topic, payload))
+                .map_err(|e| e.to_string())
+        })
+        .map_err(|e| PyRuntimeError::new_err(format!("Failed to publish topic data: {}", e)))
+    }
+
+    /// Publish a batch of `(message_type, topic, payload)` messages, waiting for
+    /// all delivery reports at once instead of one message at a time. The optional
+    /// `producer_config` overrides librdkafka settings (e.g. `linger.ms`) of the
+    /// producer used for these messages only.
+    #[pyo3(name = "publish_many")]
+    #[pyo3(signature = (messages, producer_config=None))]
+    fn pypublish_many(
+        &self,
+        py: Python,
+        messages: Vec<(String, String, Py<pyo3::types::PyBytes>)>,
+        producer_config: Option<HashMap<String, String>>,
+    ) -> PyResult<()> {
+        let producer_config = producer_config.unwrap_or_default();
+        // Borrow the payloads instead of extracting them into Vec<u8> byte by byte
+        let messages: Vec<(&str, &str, &[u8])> = messages
+            .iter()
+            .map(|(message_type, topic, payload)| {
+                (message_type.as_str(), topic.as_str(), payload.as_bytes(py))
+            })
+            .collect();
+        py.allow_threads(|| {
+            futures::executor::block_on(self.publish_many(&messages, &producer_config))
+        });
+        Ok(())
+    }
+
+    /// Wait until all messages queued by the producers have been delivered.
+    #[pyo3(name = "flush")]
+    #[pyo3(signature = (timeout_ms=5000))]
+    fn pyflush(&self, py: Python, timeout_ms: u64) -> PyResult<()> {
+        let mut producers: Vec<Arc<FutureProducer>> =
+            [self.producer.get(), self.image_producer.get()]
+                .into_iter()
+                .flatten()
+                .cloned()
+                .collect();
+        producers.extend(self.tuned_producers.lock().unwrap().values().cloned());
+        py.allow_threads(|| {
+            for producer in producers {
+                producer
+                    .flush(Duration::from_millis(timeout_ms))
+                    .map_err(|e| {
+                        PyRuntimeError::new_err(format!("Failed to flush Kafka producer: {}", e))
+                    })?;
+            }
+            Ok(())
+        })
     }
 
     #[pyo3(name = "subscribe_raw")]
@@ -387,17 +518,39 @@ impl KafkaMiddleware {
         })
     }
 
+    /// Subscribe to `(message_type, topic)` pairs with one consumer. The optional
+    /// `consumer_config` overrides librdkafka settings (e.g. `fetch.min.bytes`) of
+    /// this subscription's consumer only.
     #[pyo3(name = "subscribe_all_raw")]
+    #[pyo3(signature = (topics, callback, consumer_config=None))]
     fn pysubscribe_all_raw(
         &self,
         py: Python,
         topics: Vec<(String, String)>,
         callback: PyObject,
+        consumer_config: Option<HashMap<String, String>>,
     ) -> PyResult<()> {
         let handle = self.runtime.handle();
+        let Some(consumer_config) = consumer_config else {
+            return tokio::task::block_in_place(|| {
+                handle.block_on(self.pysubscribe_all_raw_impl(py, topics, callback))
+            });
+        };
+        let rust_callback = Box::new(move |data: &[u8]| {
+            Python::with_gil(|py| match callback.call(py, (data,), None) {
+                Ok(_) => {}
+                Err(e) => eprintln!("Error calling Python callback: {:?}", e),
+            });
+            Ok(())
+        });
         tokio::task::block_in_place(|| {
-            handle.block_on(self.pysubscribe_all_raw_impl(py, topics, callback))
+            handle.block_on(self.subscribe_all_raw_with_config(
+                topics,
+                rust_callback,
+                &consumer_config,
+            ))
         })
+        .map_err(|e| PyRuntimeError::new_err(format!("Failed to subscribe to topics: {}", e)))
     }
 }
 
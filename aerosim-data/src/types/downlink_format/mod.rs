@@ -48,3 +48,40 @@ impl DownlinkFormat {
         }
     }
 }
+
+impl DownlinkFormat {
+    /// Address of the transmitting aircraft, for formats that carry one.
+    pub fn icao(&self) -> Option<&types::ICAOAddress> {
+        match self {
+            DownlinkFormat::ShortAirAir(s) => Some(&s.icao),
+            DownlinkFormat::SurveillanceAltitude(s) => Some(&s.icao),
+            DownlinkFormat::SurveillanceIdentity(s) => Some(&s.icao),
+            DownlinkFormat::AllCall(s) => Some(&s.icao),
+            DownlinkFormat::LongAirAir(s) => Some(&s.icao),
+            DownlinkFormat::ADSB(s) => Some(&s.icao),
+            DownlinkFormat::TisB(s) => Some(&s.aa),
+            DownlinkFormat::CommBAltitude(s) => Some(&s.icao),
+            DownlinkFormat::CommBIdentity(s) => Some(&s.icao),
+            DownlinkFormat::CommDExtendedLength(s) => Some(&s.icao),
+            DownlinkFormat::ExtendedSquitterMilitaryApplication(_)
+            | DownlinkFormat::GNSSPositionData(_) => None,
+        }
+    }
+
+    /// Extended squitter payload, for ADS-B and TIS-B messages.
+    pub fn extended_squitter(&self) -> Option<&types::ME> {
+        match self {
+            DownlinkFormat::ADSB(s) => Some(&s.me),
+            DownlinkFormat::TisB(s) => Some(&s.me),
+            _ => None,
+        }
+    }
+
+    /// Parity/interrogator field, for ADS-B messages.
+    pub fn parity(&self) -> Option<&types::ICAOAddress> {
+        match self {
+            DownlinkFormat::ADSB(s) => Some(&s.pi),
+            _ => None,
+        }
+    }
+}
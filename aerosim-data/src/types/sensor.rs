@@ -407,6 +407,40 @@ impl ADSB {
         let _ = dict.set_item("message", self.message.to_dict(py)?);
         Ok(dict.into())
     }
+
+    // Flat accessors that read a single field of the message without building
+    // the nested dict returned by to_dict()
+
+    #[getter]
+    pub fn icao(&self) -> Option<String> {
+        self.message.icao().map(|icao| icao.to_hex())
+    }
+
+    #[getter]
+    pub fn parity(&self) -> Option<String> {
+        self.message.parity().map(|pi| pi.to_hex())
+    }
+
+    #[getter]
+    pub fn extended_squitter(&self, py: Python) -> PyResult<PyObject> {
+        match self.message.extended_squitter() {
+            Some(me) => me.to_dict(py),
+            None => Ok(py.None()),
+        }
+    }
+
+    pub fn __getitem__(&self, py: Python, key: &str) -> PyResult<PyObject> {
+        match key {
+            "icao" => Ok(self.icao().into_pyobject(py)?.into_any().unbind()),
+            "parity" => Ok(self.parity().into_pyobject(py)?.into_any().unbind()),
+            // to_dict() spells the key "message_extended_quitter", accept both
+            "message_extended_squitter" | "message_extended_quitter" => self.extended_squitter(py),
+            "message" => self.message.to_dict(py),
+            _ => Err(PyErr::new::<pyo3::exceptions::PyKeyError, _>(
+                key.to_string(),
+            )),
+        }
+    }
 }
 
 #[pyclass(get_all, set_all)]
@@ -1,6 +1,8 @@
 import pytest
 
 from aerosim_data import types as aerosim_types
+from aerosim_data import middleware
+from aerosim_data import flatten_to_dict
 from types import SimpleNamespace
 
 def test_json():
@@ -38,6 +40,14 @@ def test_timestamp_to_dict():
     assert timestamp_dict["sec"] == timestamp.sec
     assert timestamp_dict["nanosec"] == timestamp.nanosec
 
+def test_metadata_update_timestamps():
+    metadata = middleware.Metadata("topic", "aerosim::types::JsonData")
+    assert not metadata.is_sim_time_valid()
+    metadata.update_timestamps(aerosim_types.TimeStamp(1, 500))
+    assert metadata.is_sim_time_valid()
+    assert metadata.timestamp_sim.sec == 1
+    assert metadata.timestamp_sim.nanosec == 500
+
 def test_header():
     timestamp_sim = aerosim_types.TimeStamp(0, 0)
     timestamp_platform = aerosim_types.TimeStamp.now()
@@ -290,5 +300,25 @@ def test_vehicle_state_to_dict():
     assert vehicle_state_dict["angular_velocity"] == angular_velocity.to_dict()
     assert vehicle_state_dict["angular_acceleration"] == angular_acceleration.to_dict()
 
+def test_flatten_to_dict():
+    data = {
+        "frame_id": "frame1",
+        "pose": {
+            "position": {"x": 1.0, "y": 2.0},
+            "orientation": SimpleNamespace(w=1.0),
+        },
+        "seq": 3,
+    }
+    flat_dict = flatten_to_dict(data)
+    assert list(flat_dict.items()) == [
+        ("frame_id", "frame1"),
+        ("pose.position.x", 1.0),
+        ("pose.position.y", 2.0),
+        ("pose.orientation.w", 1.0),
+        ("seq", 3),
+    ]
+    with pytest.raises(ValueError):
+        flatten_to_dict(3)
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
@@ -82,5 +82,25 @@ def test_adsb_airborne_velocity_air():
     assert not output["message"]["message_extended_quitter"]["vertical_rate"]
     assert output["message"]["parity"] == "CBC33F"
 
+def test_adsb_flat_access():
+    hex_string = "8D4840D6202CC371C32CE0576098"
+    message = adsb_functions.parse_message(hex_string)
+    assert message.icao == "4840D6"
+    assert message.parity == "815D82"
+    assert message["icao"] == "4840D6"
+    assert message["message_extended_quitter"]["tc"] == 4
+    assert message["message_extended_quitter"]["cn"] == "KLM1023"
+    assert message["message_extended_squitter"]["tc"] == 4
+    with pytest.raises(KeyError):
+        message["unknown"]
+
+def test_adsb_parse_messages_batch():
+    hex_strings = ["8D4840D6202CC371C32CE0576098", "not a message", "8D40621D58C382D690C8AC2863A7"]
+    messages = adsb_functions.parse_messages_batch(hex_strings)
+    assert len(messages) == 3
+    assert messages[0].to_dict()["message"]["icao"] == "4840D6"
+    assert messages[1] is None
+    assert messages[2].to_dict()["message"]["icao"] == "40621D"
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,5 +1,48 @@
 pub mod decode;
 
+const INVALID_HEX: u8 = 0xFF;
+
+/// Nibble value of every ASCII byte, or `INVALID_HEX` for non-hex characters.
+const HEX_LUT: [u8; 256] = {
+    let mut table = [INVALID_HEX; 256];
+    let mut i = 0;
+    while i < 10 {
+        table[b'0' as usize + i] = i as u8;
+        i += 1;
+    }
+    let mut i = 0;
+    while i < 6 {
+        table[b'a' as usize + i] = 10 + i as u8;
+        table[b'A' as usize + i] = 10 + i as u8;
+        i += 1;
+    }
+    table
+};
+
+/// Decodes a hex-encoded Mode S message into bytes with a table lookup per
+/// nibble. Returns `None` for odd-length input or non-hex characters.
+pub(crate) fn decode_hex(message: &str) -> Option<Vec<u8>> {
+    let chars = message.as_bytes();
+    if chars.len() % 2 != 0 {
+        return None;
+    }
+
+    let mut bytes = Vec::with_capacity(chars.len() / 2);
+    let mut invalid = 0;
+    for pair in chars.chunks_exact(2) {
+        let high = HEX_LUT[pair[0] as usize];
+        let low = HEX_LUT[pair[1] as usize];
+        // Accumulate the invalid marker instead of branching on every nibble
+        invalid |= high | low;
+        bytes.push((high << 4) | (low & 0x0F));
+    }
+
+    if invalid & 0xF0 != 0 {
+        return None;
+    }
+    Some(bytes)
+}
+
 /// Computes a 24-bit CRC (parity) for a Mode S (ADS‑B) message.
 /// It is applied over the first 88 bits (11 bytes) using the polynomial 0xFFF409.
 ///
@@ -21,3 +64,24 @@ fn compute_crc24(data: &[u8]) -> u32 {
     }
     crc
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_decode_hex() {
+        assert_eq!(
+            decode_hex("8D4840D6202CC371C32CE0576098"),
+            Some(hex::decode("8D4840D6202CC371C32CE0576098").unwrap())
+        );
+        assert_eq!(
+            decode_hex("8c4841753a9a"),
+            Some(vec![0x8C, 0x48, 0x41, 0x75, 0x3A, 0x9A])
+        );
+        assert_eq!(decode_hex(""), Some(vec![]));
+        assert_eq!(decode_hex("8D4"), None);
+        assert_eq!(decode_hex("8G"), None);
+        assert_eq!(decode_hex("8D 4"), None);
+    }
+}
@@ -20,16 +20,19 @@ use aerosim_data::types::{
     sensor::ADSB,
 };
 
+use super::decode_hex;
 use adsb_deku::{deku::DekuContainerRead, Frame, DF};
 use pyo3::prelude::*;
+use rayon::prelude::*;
 
 #[pyfunction]
-pub fn message_to_string(message: &str) -> PyResult<String> {
-    let bytes = hex::decode(message)
-        .map_err(|_| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))?;
-    let (_, frame) = Frame::from_bytes((&bytes[..], 0))
-        .map_err(|_| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))?;
-    Ok(frame.to_string())
+pub fn message_to_string(py: Python, message: &str) -> PyResult<String> {
+    py.allow_threads(|| {
+        let bytes = decode_hex(message)?;
+        let (_, frame) = Frame::from_bytes((&bytes[..], 0)).ok()?;
+        Some(frame.to_string())
+    })
+    .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))
 }
 
 #[pyfunction]
@@ -57,11 +60,27 @@ pub fn adsb_from_gnss_data(
 }
 
 #[pyfunction]
-pub fn parse_message(message: &str) -> PyResult<ADSB> {
-    let bytes = hex::decode(message)
-        .map_err(|_| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))?;
-    let (_, frame) = Frame::from_bytes((&bytes[..], 0))
-        .map_err(|_| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))?;
+pub fn parse_message(py: Python, message: &str) -> PyResult<ADSB> {
+    py.allow_threads(|| decode_message(message))
+        .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Invalid message"))
+}
+
+/// Parses a list of hex-encoded messages in parallel without holding the GIL.
+/// Messages that cannot be parsed are returned as `None` so that a single bad
+/// frame does not discard the rest of the batch.
+#[pyfunction]
+pub fn parse_messages_batch(py: Python, messages: Vec<String>) -> Vec<Option<ADSB>> {
+    py.allow_threads(|| {
+        messages
+            .par_iter()
+            .map(|message| decode_message(message))
+            .collect()
+    })
+}
+
+fn decode_message(message: &str) -> Option<ADSB> {
+    let bytes = decode_hex(message)?;
+    let (_, frame) = Frame::from_bytes((&bytes[..], 0)).ok()?;
 
     let message = match frame.df {
         DF::ShortAirAirSurveillance { altitude, .. } => {
@@ -203,7 +222,7 @@ pub fn parse_message(message: &str) -> PyResult<ADSB> {
         }
     };
 
-    Ok(ADSB { message })
+    Some(ADSB { message })
 }
 
 fn get_me_from_adsb(deku_me: adsb_deku::adsb::ME) -> aerosim_data::types::adsb::types::ME {
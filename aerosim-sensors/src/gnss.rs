@@ -31,61 +31,93 @@ impl Vector3 {
     }
 }
 
+use numpy::PyReadwriteArray1;
 use pyo3::{prelude::*, types::PyDict};
-#[pyclass(extends=Sensor, get_all, set_all)]
-#[derive(Clone, Copy, Debug)]
+use std::sync::OnceLock;
+
+#[pyclass(extends=Sensor)]
+#[derive(Clone, Debug)]
 pub struct GNSS {
-    pub latitude: f64,     // Latitude in decimal degrees
-    pub longitude: f64,    // Longitude in decimal degrees
-    pub altitude: f64,     // Altitude in meters above mean sea level
+    #[pyo3(get)]
+    pub latitude: f64, // Latitude in decimal degrees
+    #[pyo3(get)]
+    pub longitude: f64, // Longitude in decimal degrees
+    #[pyo3(get, set)]
+    pub altitude: f64, // Altitude in meters above mean sea level
     pub velocity: Vector3, // Velocity in the north, east and downward directions (m/s)
-    pub heading: f64,      // Heading or course over ground in degrees
-    pub timestamp: f64,    // Timestamp of the data in seconds since epoch
+    #[pyo3(get, set)]
+    pub heading: f64, // Heading or course over ground in degrees
+    #[pyo3(get, set)]
+    pub timestamp: f64, // Timestamp of the data in seconds since epoch
+    #[pyo3(get, set)]
     pub prev_velocity: Option<Vector3>,
+    #[pyo3(get, set)]
     pub prev_timestamp: Option<f64>,
+    // Lazily computed trig terms of (latitude, longitude), cleared whenever they change
+    trig: OnceLock<GeodeticTrig>,
+    // Mercator projection of (latitude, longitude), cleared whenever they change
+    mercator: OnceLock<(f64, f64)>,
 }
 
 const EQUATORIAL_EARTH_RADIUS: f64 = 6_378_137.0;
 const POLAR_EARTH_RADIUS: f64 = 6_356_752.314_245;
 const EARTH_FLATTENING: f64 =
     (EQUATORIAL_EARTH_RADIUS - POLAR_EARTH_RADIUS) / EQUATORIAL_EARTH_RADIUS;
+// Degrees of longitude per meter of Mercator x (arc length along the equator)
+const DEGREES_PER_EQUATORIAL_METER: f64 = 180.0 / (std::f64::consts::PI * EQUATORIAL_EARTH_RADIUS);
 
-#[pymethods]
-impl GNSS {
-    #[new]
-    #[pyo3(signature = (latitude, longitude, altitude, velocity_n=0.0, velocity_e=0.0, velocity_d=0.0, heading=0.0, timestamp=0.0))]
-    fn new(
-        latitude: f64,
-        longitude: f64,
-        altitude: f64,
-        velocity_n: f64,
-        velocity_e: f64,
-        velocity_d: f64,
-        heading: f64,
-        timestamp: f64,
-    ) -> (Self, Sensor) {
-        let velocity = Vector3::new(velocity_n, velocity_e, velocity_d);
-        (
-            Self {
-                latitude,
-                longitude,
-                altitude,
-                velocity,
-                heading,
-                timestamp,
-                prev_velocity: None,
-                prev_timestamp: None,
-            },
-            Sensor::new("GNSS".to_string(), 0.0),
-        )
+fn latitude_from_mercator(y: f64) -> f64 {
+    (2.0 * (y / EQUATORIAL_EARTH_RADIUS).exp().atan() - std::f64::consts::FRAC_PI_2).to_degrees()
+}
+
+/// Trigonometric terms of a geodetic position that are shared by the ECEF and
+/// NED conversions, so a reference point reused across calls only pays for
+/// them once.
+#[derive(Clone, Copy, Debug)]
+struct GeodeticTrig {
+    sin_lat: f64,
+    cos_lat: f64,
+    sin_lon: f64,
+    cos_lon: f64,
+    // Prime vertical radius of curvature at the latitude
+    n: f64,
+    // Rows map an ECEF offset to north, east and down
+    ecef_to_ned: [[f64; 3]; 3],
+}
+
+impl GeodeticTrig {
+    fn new(latitude: f64, longitude: f64) -> Self {
+        let (sin_lat, cos_lat) = latitude.to_radians().sin_cos();
+        let (sin_lon, cos_lon) = longitude.to_radians().sin_cos();
+        let n = EQUATORIAL_EARTH_RADIUS
+            / (1.0 - EARTH_FLATTENING * (2.0 - EARTH_FLATTENING) * sin_lat.powi(2)).sqrt();
+        let ecef_to_ned = [
+            [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+            [-sin_lon, cos_lon, 0.0],
+            [-cos_lat * cos_lon, -cos_lat * sin_lon, -sin_lat],
+        ];
+        Self {
+            sin_lat,
+            cos_lat,
+            sin_lon,
+            cos_lon,
+            n,
+            ecef_to_ned,
+        }
     }
 
-    fn translate(&mut self, x: f64, y: f64, z: f64) {
-        let mut mercator = self.to_mercator();
-        mercator.0 += x;
-        mercator.1 += y;
+    fn ecef_delta_to_ned(&self, dx: f64, dy: f64, dz: f64) -> (f64, f64, f64) {
+        let [north, east, down] = self
+            .ecef_to_ned
+            .map(|row| row[0] * dx + row[1] * dy + row[2] * dz);
+        (north, east, down)
+    }
+}
 
-        self.from_mercator(mercator.0, mercator.1, z);
+impl GNSS {
+    fn trig(&self) -> &GeodeticTrig {
+        self.trig
+            .get_or_init(|| GeodeticTrig::new(self.latitude, self.longitude))
     }
 
     fn calculate_distance(&self, other: &Self) -> Option<f64> {
@@ -173,13 +205,9 @@ impl GNSS {
         Some(POLAR_EARTH_RADIUS * a * (sigma - delta_sigma))
     }
 
-    fn to_mercator(&self) -> (f64, f64) {
-        let x = EQUATORIAL_EARTH_RADIUS * self.longitude.to_radians();
-        let y = EQUATORIAL_EARTH_RADIUS
-            * (std::f64::consts::FRAC_PI_4 + self.latitude.to_radians() / 2.0)
-                .tan()
-                .ln();
-        (x, y)
+    fn clear_position_caches(&mut self) {
+        self.trig.take();
+        self.mercator.take();
     }
 
     fn to_ned(&self, target: &Self) -> (f64, f64, f64) {
@@ -187,21 +215,100 @@ impl GNSS {
         let target_ecef = target.to_ecef();
         self.ecef_to_ned(target_ecef, ref_ecef, self.latitude, self.longitude)
     }
+}
 
-    fn to_ecef(&self) -> (f64, f64, f64) {
-        let lat_rad = self.latitude.to_radians();
-        let lon_rad = self.longitude.to_radians();
+#[pymethods]
+impl GNSS {
+    #[new]
+    #[pyo3(signature = (latitude, longitude, altitude, velocity_n=0.0, velocity_e=0.0, velocity_d=0.0, heading=0.0, timestamp=0.0))]
+    fn new(
+        latitude: f64,
+        longitude: f64,
+        altitude: f64,
+        velocity_n: f64,
+        velocity_e: f64,
+        velocity_d: f64,
+        heading: f64,
+        timestamp: f64,
+    ) -> (Self, Sensor) {
+        let velocity = Vector3::new(velocity_n, velocity_e, velocity_d);
+        (
+            Self {
+                latitude,
+                longitude,
+                altitude,
+                velocity,
+                heading,
+                timestamp,
+                prev_velocity: None,
+                prev_timestamp: None,
+                trig: OnceLock::new(),
+                mercator: OnceLock::new(),
+            },
+            Sensor::new("GNSS".to_string(), 0.0),
+        )
+    }
 
-        let sin_lat = lat_rad.sin();
-        let cos_lat = lat_rad.cos();
-        let cos_lon = lon_rad.cos();
-        let sin_lon = lon_rad.sin();
+    fn translate(&mut self, x: f64, y: f64, z: f64) {
+        // Mercator x is linear in longitude, so only the latitude needs the
+        // inverse projection
+        let (_, mercator_y) = self.to_mercator();
+        self.longitude += x * DEGREES_PER_EQUATORIAL_METER;
+        self.latitude = latitude_from_mercator(mercator_y + y);
+        self.altitude = z;
+        self.clear_position_caches();
+    }
 
-        let n = EQUATORIAL_EARTH_RADIUS
-            / (1.0 - EARTH_FLATTENING * (2.0 - EARTH_FLATTENING) * sin_lat.powi(2)).sqrt();
-        let x = (n + self.altitude) * cos_lat * cos_lon;
-        let y = (n + self.altitude) * cos_lat * sin_lon;
-        let z = (n * (1.0 - EARTH_FLATTENING).powi(2) + self.altitude) * sin_lat;
+    // Vincenty's iteration is the most expensive GNSS call, so it runs
+    // without holding the GIL
+    #[pyo3(name = "calculate_distance")]
+    fn py_calculate_distance(&self, py: Python, other: &Self) -> Option<f64> {
+        py.allow_threads(|| self.calculate_distance(other))
+    }
+
+    fn to_mercator(&self) -> (f64, f64) {
+        *self.mercator.get_or_init(|| {
+            let x = EQUATORIAL_EARTH_RADIUS * self.longitude.to_radians();
+            let y = EQUATORIAL_EARTH_RADIUS
+                * (std::f64::consts::FRAC_PI_4 + self.latitude.to_radians() / 2.0)
+                    .tan()
+                    .ln();
+            (x, y)
+        })
+    }
+
+    // Writes into `out` (a float64 array of length 3) and returns it when given,
+    // so callers converting every step can reuse one buffer instead of
+    // allocating a new tuple per call
+    #[pyo3(name = "to_ned", signature = (target, out=None))]
+    fn py_to_ned(
+        &self,
+        py: Python,
+        target: &Self,
+        out: Option<PyReadwriteArray1<'_, f64>>,
+    ) -> PyResult<PyObject> {
+        let (n, e, d) = self.to_ned(target);
+        match out {
+            Some(mut out) => {
+                let values = out.as_slice_mut()?;
+                if values.len() != 3 {
+                    return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                        "Expected an output array of length 3",
+                    ));
+                }
+                values.copy_from_slice(&[n, e, d]);
+                Ok(out.as_any().clone().unbind())
+            }
+            None => Ok((n, e, d).into_pyobject(py)?.into_any().unbind()),
+        }
+    }
+
+    fn to_ecef(&self) -> (f64, f64, f64) {
+        let trig = self.trig();
+
+        let x = (trig.n + self.altitude) * trig.cos_lat * trig.cos_lon;
+        let y = (trig.n + self.altitude) * trig.cos_lat * trig.sin_lon;
+        let z = (trig.n * (1.0 - EARTH_FLATTENING).powi(2) + self.altitude) * trig.sin_lat;
 
         (x, y, z)
     }
@@ -219,19 +326,11 @@ impl GNSS {
             target_ecef.2 - ref_ecef.2,
         );
 
-        let lat_rad = ref_lat.to_radians();
-        let lon_rad = ref_lon.to_radians();
-
-        let sin_lat = lat_rad.sin();
-        let cos_lat = lat_rad.cos();
-        let sin_lon = lon_rad.sin();
-        let cos_lon = lon_rad.cos();
-
-        let ned_north = -sin_lat * cos_lon * dx - sin_lat * sin_lon * dy + cos_lat * dz;
-        let ned_east = -sin_lon * dx + cos_lon * dy;
-        let ned_down = -cos_lat * cos_lon * dx - cos_lat * sin_lon * dy - sin_lat * dz;
-
-        (ned_north, ned_east, ned_down)
+        if ref_lat == self.latitude && ref_lon == self.longitude {
+            self.trig().ecef_delta_to_ned(dx, dy, dz)
+        } else {
+            GeodeticTrig::new(ref_lat, ref_lon).ecef_delta_to_ned(dx, dy, dz)
+        }
     }
 
     #[getter(velocity)]
@@ -245,14 +344,33 @@ impl GNSS {
         Ok(())
     }
 
+    #[setter(latitude)]
+    fn set_latitude(&mut self, latitude: f64) -> PyResult<()> {
+        self.latitude = latitude;
+        self.clear_position_caches();
+        Ok(())
+    }
+
+    #[setter(longitude)]
+    fn set_longitude(&mut self, longitude: f64) -> PyResult<()> {
+        self.longitude = longitude;
+        self.clear_position_caches();
+        Ok(())
+    }
+
     #[pyo3(signature = (x, y, z=0.0))]
     fn from_mercator(&mut self, x: f64, y: f64, z: f64) {
-        self.longitude = x / EQUATORIAL_EARTH_RADIUS * 180.0 / std::f64::consts::PI;
-        self.latitude = (2.0 * (y / EQUATORIAL_EARTH_RADIUS).exp().atan()
-            - std::f64::consts::FRAC_PI_2)
-            * 180.0
-            / std::f64::consts::PI;
+        // Round trip of the current position: keep the exact latitude/longitude
+        // instead of recovering them through the inverse projection
+        if self.mercator.get() == Some(&(x, y)) {
+            self.altitude = z;
+            return;
+        }
+
+        self.longitude = x * DEGREES_PER_EQUATORIAL_METER;
+        self.latitude = latitude_from_mercator(y);
         self.altitude = z;
+        self.clear_position_caches();
     }
 
     pub fn update(
@@ -269,6 +387,9 @@ impl GNSS {
         self.prev_velocity = Some(self.velocity);
         self.prev_timestamp = Some(self.timestamp);
 
+        if latitude != self.latitude || longitude != self.longitude {
+            self.clear_position_caches();
+        }
         self.latitude = latitude;
         self.longitude = longitude;
         self.altitude = altitude;
@@ -388,6 +509,21 @@ mod tests {
         );
     }
 
+    #[test]
+    fn test_mercator_round_trip_is_exact() {
+        let (mut gnss, _) = GNSS::new(40.730610, -73.935242, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0);
+
+        let (x, y) = gnss.to_mercator();
+        gnss.from_mercator(x, y, 10.0);
+        assert_eq!(gnss.latitude, 40.730610);
+        assert_eq!(gnss.longitude, -73.935242);
+        assert_eq!(gnss.altitude, 10.0);
+
+        // A different point still goes through the inverse projection
+        gnss.from_mercator(x + 1000.0, y, 0.0);
+        assert!(gnss.longitude > -73.935242);
+    }
+
     #[test]
     fn test_calculate_distance() {
         let la_longitude = -118.243683;
@@ -523,6 +659,26 @@ mod tests {
         );
     }
 
+    #[test]
+    fn test_gnss_ned_after_reference_update() {
+        let (mut reference, _) = GNSS::new(37.6194495, -122.3767776, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0);
+        let (target, _) = GNSS::new(37.6481151, -122.4247364, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0);
+
+        // Populate the cached trig terms for the original reference position
+        let _ = reference.to_ned(&target);
+        reference.update(37.6481151, -122.4247364, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0);
+
+        let (n, e, d) = reference.to_ned(&target);
+        let delta_error = 1e-3;
+        assert!(
+            n.abs() < delta_error && e.abs() < delta_error && d.abs() < delta_error,
+            "Error: got ned = ({}, {}, {}), expected = (0, 0, 0)",
+            n,
+            e,
+            d
+        );
+    }
+
     #[test]
     fn test_translate() {
         let (mut sensor, _) = GNSS::new(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0);
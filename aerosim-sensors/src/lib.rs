@@ -1,8 +1,13 @@
 pub mod adsb;
 pub mod gnss;
 pub mod imu;
+mod value_column;
 
+use numpy::PyReadonlyArray1;
 use pyo3::prelude::*;
+use std::collections::HashMap;
+use std::sync::Arc;
+use value_column::{Precision, ValueColumn};
 
 #[pyclass(subclass)]
 #[derive(Clone, Debug)]
@@ -30,30 +35,109 @@ impl Sensor {
     }
 }
 
+// Sensors are stored column-wise so the values stay contiguous and can be
+// handed to NumPy in a single copy. Names repeat across many sensors, so each
+// unique name is stored once and sensors refer to it by id. Values can be
+// stored at reduced precision (f32/bf16) when f64 is not needed.
 #[pyclass]
 pub struct SensorManager {
-    pub sensors: Vec<Sensor>,
+    name_pool: Vec<Arc<str>>,
+    name_lookup: HashMap<Arc<str>, u32>,
+    name_ids: Vec<u32>,
+    values: ValueColumn,
+}
+
+impl SensorManager {
+    fn intern_name(&mut self, name: &str) -> u32 {
+        if let Some(&id) = self.name_lookup.get(name) {
+            return id;
+        }
+        let id = self.name_pool.len() as u32;
+        let name: Arc<str> = Arc::from(name);
+        self.name_pool.push(name.clone());
+        self.name_lookup.insert(name, id);
+        id
+    }
+
+    fn sensor_at(&self, index: usize) -> Option<Sensor> {
+        let name_id = *self.name_ids.get(index)?;
+        Some(Sensor {
+            name: self.name_pool[name_id as usize].to_string(),
+            value: self.values.get(index)?,
+        })
+    }
 }
 
 #[pymethods]
 impl SensorManager {
     #[new]
-    fn new() -> Self {
-        SensorManager {
-            sensors: Vec::new(),
-        }
+    #[pyo3(signature = (precision="f64"))]
+    fn new(precision: &str) -> PyResult<Self> {
+        Ok(SensorManager {
+            name_pool: Vec::new(),
+            name_lookup: HashMap::new(),
+            name_ids: Vec::new(),
+            values: ValueColumn::new(Precision::from_name(precision)?),
+        })
+    }
+
+    #[getter]
+    fn precision(&self) -> &'static str {
+        self.values.precision().name()
     }
 
     fn add_sensor(&mut self, sensor: Sensor) {
-        self.sensors.push(sensor);
+        let name_id = self.intern_name(&sensor.name);
+        self.name_ids.push(name_id);
+        self.values.push(sensor.value);
     }
 
     fn get_sensor(&self, index: usize) -> Option<Sensor> {
-        self.sensors.get(index).cloned()
+        self.sensor_at(index)
     }
 
     fn get_all_sensors(&self) -> Vec<Sensor> {
-        self.sensors.clone()
+        (0..self.name_ids.len())
+            .filter_map(|index| self.sensor_at(index))
+            .collect()
+    }
+
+    // Indices of all sensors with the given name, in insertion order
+    fn find_sensors(&self, name: &str) -> Vec<usize> {
+        match self.name_lookup.get(name) {
+            Some(&name_id) => self
+                .name_ids
+                .iter()
+                .enumerate()
+                .filter(|(_, &id)| id == name_id)
+                .map(|(index, _)| index)
+                .collect(),
+            None => Vec::new(),
+        }
+    }
+
+    fn __len__(&self) -> usize {
+        self.name_ids.len()
+    }
+
+    // Values of all sensors as a NumPy array in the storage precision (bf16 is
+    // widened to float32), in insertion order
+    fn values_array<'py>(&self, py: Python<'py>) -> Bound<'py, PyAny> {
+        self.values.to_pyarray(py)
+    }
+
+    // Bulk update of all sensor values from a NumPy array, in insertion order
+    fn set_values(&mut self, values: PyReadonlyArray1<'_, f64>) -> PyResult<()> {
+        let values = values.as_slice()?;
+        if values.len() != self.values.len() {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "Expected {} values, got {}",
+                self.values.len(),
+                values.len()
+            )));
+        }
+        self.values.copy_from_slice(values);
+        Ok(())
     }
 }
 
@@ -69,6 +153,7 @@ fn _sensors(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     adsb.add_function(wrap_pyfunction!(adsb::decode::adsb_from_gnss_data, &adsb)?)?;
     adsb.add_function(wrap_pyfunction!(adsb::decode::message_to_string, &adsb)?)?;
     adsb.add_function(wrap_pyfunction!(adsb::decode::parse_message, &adsb)?)?;
+    adsb.add_function(wrap_pyfunction!(adsb::decode::parse_messages_batch, &adsb)?)?;
 
     m.add_submodule(&adsb)?;
 
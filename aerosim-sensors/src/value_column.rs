@@ -0,0 +1,162 @@
+use numpy::PyArray1;
+use pyo3::prelude::*;
+
+/// Storage precision of sensor values in a `SensorManager`.
+///
+/// Values are always read back as f64. Narrower storage rounds to nearest,
+/// so the relative error of a stored value is at most 2^-24 for F32 and
+/// 2^-8 for BF16 (exact for F64).
+#[derive(Clone, Copy, Debug, PartialEq)]
+pub enum Precision {
+    F64,
+    F32,
+    BF16,
+}
+
+impl Precision {
+    pub fn from_name(name: &str) -> PyResult<Self> {
+        match name.to_lowercase().as_str() {
+            "f64" | "float64" => Ok(Precision::F64),
+            "f32" | "float32" => Ok(Precision::F32),
+            "bf16" | "bfloat16" => Ok(Precision::BF16),
+            _ => Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "Unsupported precision '{}', expected 'f64', 'f32' or 'bf16'",
+                name
+            ))),
+        }
+    }
+
+    pub fn name(&self) -> &'static str {
+        match self {
+            Precision::F64 => "f64",
+            Precision::F32 => "f32",
+            Precision::BF16 => "bf16",
+        }
+    }
+}
+
+/// Contiguous column of sensor values stored at a fixed precision.
+#[derive(Clone, Debug)]
+pub enum ValueColumn {
+    F64(Vec<f64>),
+    F32(Vec<f32>),
+    BF16(Vec<u16>),
+}
+
+impl ValueColumn {
+    pub fn new(precision: Precision) -> Self {
+        match precision {
+            Precision::F64 => ValueColumn::F64(Vec::new()),
+            Precision::F32 => ValueColumn::F32(Vec::new()),
+            Precision::BF16 => ValueColumn::BF16(Vec::new()),
+        }
+    }
+
+    pub fn precision(&self) -> Precision {
+        match self {
+            ValueColumn::F64(_) => Precision::F64,
+            ValueColumn::F32(_) => Precision::F32,
+            ValueColumn::BF16(_) => Precision::BF16,
+        }
+    }
+
+    pub fn len(&self) -> usize {
+        match self {
+            ValueColumn::F64(values) => values.len(),
+            ValueColumn::F32(values) => values.len(),
+            ValueColumn::BF16(values) => values.len(),
+        }
+    }
+
+    pub fn push(&mut self, value: f64) {
+        match self {
+            ValueColumn::F64(values) => values.push(value),
+            ValueColumn::F32(values) => values.push(value as f32),
+            ValueColumn::BF16(values) => values.push(f32_to_bf16(value as f32)),
+        }
+    }
+
+    pub fn get(&self, index: usize) -> Option<f64> {
+        match self {
+            ValueColumn::F64(values) => values.get(index).copied(),
+            ValueColumn::F32(values) => values.get(index).map(|&value| value as f64),
+            ValueColumn::BF16(values) => values.get(index).map(|&value| bf16_to_f32(value) as f64),
+        }
+    }
+
+    pub fn copy_from_slice(&mut self, source: &[f64]) {
+        match self {
+            ValueColumn::F64(values) => values.copy_from_slice(source),
+            ValueColumn::F32(values) => {
+                for (value, &new_value) in values.iter_mut().zip(source) {
+                    *value = new_value as f32;
+                }
+            }
+            ValueColumn::BF16(values) => {
+                for (value, &new_value) in values.iter_mut().zip(source) {
+                    *value = f32_to_bf16(new_value as f32);
+                }
+            }
+        }
+    }
+
+    // NumPy has no native bfloat16 dtype, so BF16 columns are widened to float32
+    pub fn to_pyarray<'py>(&self, py: Python<'py>) -> Bound<'py, PyAny> {
+        match self {
+            ValueColumn::F64(values) => PyArray1::from_slice(py, values.as_slice()).into_any(),
+            ValueColumn::F32(values) => PyArray1::from_slice(py, values.as_slice()).into_any(),
+            ValueColumn::BF16(values) => {
+                let widened: Vec<f32> = values.iter().map(|&value| bf16_to_f32(value)).collect();
+                PyArray1::from_vec(py, widened).into_any()
+            }
+        }
+    }
+}
+
+fn f32_to_bf16(value: f32) -> u16 {
+    let bits = value.to_bits();
+    if value.is_nan() {
+        // Keep a quiet NaN instead of letting the rounding carry into the exponent
+        return ((bits >> 16) as u16) | 0x0040;
+    }
+    // Round to nearest, ties to even
+    let rounding_bias = 0x7FFF + ((bits >> 16) & 1);
+    ((bits + rounding_bias) >> 16) as u16
+}
+
+fn bf16_to_f32(value: u16) -> f32 {
+    f32::from_bits((value as u32) << 16)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_value_column_round_trip() {
+        for precision in [Precision::F64, Precision::F32, Precision::BF16] {
+            let mut column = ValueColumn::new(precision);
+            column.push(25.0);
+            column.push(-1.0);
+            assert_eq!(column.len(), 2);
+            assert_eq!(column.get(0), Some(25.0));
+            assert_eq!(column.get(1), Some(-1.0));
+            assert_eq!(column.get(2), None);
+        }
+    }
+
+    #[test]
+    fn test_value_column_error_bounds() {
+        let value = 1013.25_f64;
+
+        let mut column = ValueColumn::new(Precision::F32);
+        column.push(value);
+        let error = ((column.get(0).unwrap() - value) / value).abs();
+        assert!(error <= 2f64.powi(-24), "f32 relative error {}", error);
+
+        let mut column = ValueColumn::new(Precision::BF16);
+        column.push(value);
+        let error = ((column.get(0).unwrap() - value) / value).abs();
+        assert!(error <= 2f64.powi(-8), "bf16 relative error {}", error);
+    }
+}
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from aerosim_sensors import Sensor, SensorManager, GNSS
 
@@ -53,6 +54,45 @@ def test_sensor_manager_get_all_sensors():
     assert sensors[0].name == "Altitude"
     assert sensors[1].name == "Pressure"
 
+def test_sensor_manager_find_sensors():
+    manager = SensorManager()
+    manager.add_sensor(Sensor("Altitude", 25.0))
+    manager.add_sensor(Sensor("Pressure", 1.0))
+    manager.add_sensor(Sensor("Altitude", 30.0))
+    assert manager.find_sensors("Altitude") == [0, 2]
+    assert manager.find_sensors("Pressure") == [1]
+    assert manager.find_sensors("Temperature") == []
+    assert manager.get_sensor(2).name == "Altitude"
+
+def test_sensor_manager_values_array():
+    manager = SensorManager()
+    manager.add_sensor(Sensor("Altitude", 25.0))
+    manager.add_sensor(Sensor("Pressure", 1.0))
+    values = manager.values_array()
+    assert values.tolist() == [25.0, 1.0]
+
+    manager.set_values(np.array([30.0, 2.0]))
+    assert manager.get_sensor(0).get_value() == 30.0
+    assert manager.get_sensor(1).get_value() == 2.0
+
+    with pytest.raises(ValueError):
+        manager.set_values(np.array([1.0]))
+
+def test_sensor_manager_precision():
+    manager = SensorManager(precision="f32")
+    assert manager.precision == "f32"
+    manager.add_sensor(Sensor("Altitude", 25.0))
+    assert manager.get_sensor(0).get_value() == 25.0
+    assert manager.values_array().dtype == np.float32
+
+    manager = SensorManager(precision="bf16")
+    manager.add_sensor(Sensor("Pressure", 1013.25))
+    value = manager.get_sensor(0).get_value()
+    assert abs(value - 1013.25) / 1013.25 <= 2**-8
+
+    with pytest.raises(ValueError):
+        SensorManager(precision="f16")
+
 def test_gnss_velocity():
     gnss = GNSS(latitude=0.0, longitude=0.0, altitude=0.0)
     (n, e, d) = gnss.velocity
@@ -153,6 +193,20 @@ def test_gnss_ned_3():
     assert(abs(e - expected_e) < delta_error)
     assert(abs(d - expected_d) < delta_error)
 
+def test_gnss_ned_out():
+    reference = GNSS(latitude=37.6194495, longitude=-122.3767776, altitude=0.0)
+    target = GNSS(latitude=37.6420439, longitude=-122.4094735, altitude=304.8)
+
+    out = np.zeros(3)
+    result = reference.to_ned(target, out=out)
+    assert result is out
+
+    expected = reference.to_ned(target)
+    assert out.tolist() == list(expected)
+
+    with pytest.raises(ValueError):
+        reference.to_ned(target, out=np.zeros(2))
+
 def test_translate():
     sensor = GNSS(latitude=0.0, longitude=0.0, altitude=0.0)
     sensor.translate(1000.0, 500.0, 0.0)
@@ -1,8 +1,19 @@
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import logging
+import operator
 import os
+import queue
 import shutil
+import sys
+import tempfile
 import threading
+import zipfile
 
-from dotty_dictionary import dotty
+import numpy as np
+import orjson
 
 import fmpy
 from fmpy.fmi3 import FMU3Slave
@@ -13,8 +24,112 @@ from aerosim_data import middleware
 from aerosim_data import flatten_to_dict
 from aerosim_sensors import adsb_functions
 
+logger = logging.getLogger("aerosim.fmudriver")
+
+# Names of the fmpy setter/getter methods for each kind of FMU variable, keyed by
+# FMI version
+FMU_ACCESSOR_NAMES = {
+    "3.0": {
+        "float": ("setFloat64", "getFloat64"),
+        "int": ("setInt64", "getInt64"),
+        "string": ("setString", "getString"),
+        "bool": ("setBoolean", "getBoolean"),
+    },
+    "2.0": {
+        "float": ("setReal", "getReal"),
+        "int": ("setInteger", "getInteger"),
+        "string": ("setString", "getString"),
+        "bool": ("setBoolean", "getBoolean"),
+    },
+}
+
+# Kind of accessor used for each supported FMU variable type
+FMU_VAR_KINDS = {
+    "Real": "float",
+    "Float64": "float",
+    "Integer": "int",
+    "Int64": "int",
+    "String": "string",
+    "Boolean": "bool",
+}
+
+# Kafka consumer settings of the FMU input subscription that let each fetch carry
+# more input messages at high step rates. The per-partition limit is left to the
+# transport's fetch.message.max.bytes (max.partition.fetch.bytes is its alias).
+KAFKA_CONSUMER_CONFIG = {
+    "fetch.min.bytes": "1",
+    "fetch.max.bytes": str(10 * 1024 * 1024),
+}
+
+# Prefix of the topic variable names for each supported input message type
+INPUT_VAR_PREFIXES = {
+    "aerosim::types::VehicleState": "vehicle_state.",
+    "aerosim::types::EffectorState": "effector_state.",
+    "aerosim::types::AutopilotCommand": "autopilot_command.",
+    "aerosim::types::FlightControlCommand": "flight_control_command.",
+    "aerosim::types::AircraftEffectorCommand": "aircraft_effector_command.",
+    "aerosim::types::PrimaryFlightDisplayData": "primary_flight_display_data.",
+}
+
+
+def to_publish_value(value):
+    # Float array variables are NumPy views into the FMU driver's float buffer,
+    # which are converted to lists only when they are packed into a message
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def serialize_json_data(serializer, metadata, data: dict):
+    return serializer.serialize_message(metadata, aerosim_types.JsonData(data))
+
+
+def compile_flattener(sample: dict):
+    # Typed messages always have the same fields, so generate a straight-line
+    # function that builds the flattened dict of a message with the leaf paths
+    # of a sample message inlined. Returns None if the sample's shape is not fixed
+    # (empty dicts or null fields that could hold a nested struct). The generated
+    # function returns None for a message whose key set differs from the sample's,
+    # so that the caller can fall back to flatten_to_dict.
+    leaf_paths = []
+    dict_sizes = [((), len(sample))]
+    stack = [((), iter(sample.items()))]
+    while stack:
+        path, items = stack[-1]
+        for k, v in items:
+            if isinstance(v, dict):
+                if not v:
+                    return None
+                dict_sizes.append((path + (k,), len(v)))
+                stack.append((path + (k,), iter(v.items())))
+                break
+            if v is None:
+                return None
+            leaf_paths.append(path + (k,))
+        else:
+            stack.pop()
+
+    size_checks = " or ".join(
+        f"len(d{''.join(f'[{k!r}]' for k in dict_path)}) != {size}"
+        for dict_path, size in dict_sizes
+    )
+    lines = ["def flatten(d):", f"    if {size_checks}:", "        return None"]
+    lines.append("    return {")
+    for leaf_path in leaf_paths:
+        access = "".join(f"[{k!r}]" for k in leaf_path)
+        lines.append(f"        {'.'.join(leaf_path)!r}: d{access},")
+    lines.append("    }")
+    namespace = {}
+    exec(compile("\n".join(lines) + "\n", "<flattener>", "exec"), namespace)
+    return namespace["flatten"]
+
 
 class FmuDriver:
+    # One lock per FMU file, so that concurrent drivers loading the same FMU
+    # extract it only once
+    _extract_locks = {}
+    _extract_locks_guard = threading.Lock()
+
     def __init__(self, fmu_id: str, working_dir: str = "") -> None:
         self.fmu_id = fmu_id
         self.working_dir = working_dir
@@ -27,36 +142,52 @@ class FmuDriver:
         self.sim_start_time = aerosim_types.TimeStamp(0, 0)
 
         self._running = True
-        self._processing_callback_lock = threading.Lock()
+
+        # Serializing and sending a step's outputs runs on a worker thread so that it
+        # overlaps with the next step's doStep. The worker runs from start() to stop().
+        self._publish_executor = None
+        self._pending_publish = None
+
+        # Clock ticks and orchestrator commands are queued by the Kafka callbacks and
+        # processed in order by a dedicated step thread, which is the only thread
+        # that touches the FMU state, so no lock is needed between them
+        self._control_events = queue.SimpleQueue()  # [(data, metadata) or None to stop]
+        self._step_thread = None
 
         self.transport = middleware.get_transport("kafka")
         self.serializer = self.transport.get_serializer()
 
-        self.transport.subscribe(
+        # Orchestrator commands must flow before the sim config is loaded, so they
+        # share one consumer with the clock, separate from the FMU input topics
+        self.transport.subscribe_all(
             aerosim_types.JsonData,
-            "aerosim.orchestrator.commands",
-            self.orchestator_commands_callback,
-        )
-        self.transport.subscribe(
-            aerosim_types.JsonData, "aerosim.clock", self.clock_callback
+            ["aerosim.orchestrator.commands", "aerosim.clock"],
+            self.control_callback,
         )
 
         self.reset_data()
 
     def __del__(self):
-        # Delete temporary folder where FMU was unzipped
+        # Delete temporary folder where FMU was unzipped, keeping cached extractions
+        # for the next run
         dir_to_delete = self.unzipped_temp_dir
-        if dir_to_delete is not None:
+        if dir_to_delete is not None and not self.is_cached_extract_dir(dir_to_delete):
             try:
-                print(
-                    f"{self.fmudriver_name} Deleting extracted FMU at: {dir_to_delete}"
+                logger.info(
+                    "%s Deleting extracted FMU at: %s",
+                    self.fmudriver_name,
+                    dir_to_delete,
                 )
                 shutil.rmtree(dir_to_delete)
-                print(
-                    f"{self.fmudriver_name} Successfully deleted extracted FMU at: {dir_to_delete}"
+                logger.info(
+                    "%s Successfully deleted extracted FMU at: %s",
+                    self.fmudriver_name,
+                    dir_to_delete,
                 )
             except OSError as e:
-                print(f"{self.fmudriver_name} Error deleting extracted FMU: {e}")
+                logger.error(
+                    "%s Error deleting extracted FMU: %s", self.fmudriver_name, e
+                )
 
     def reset_data(self):
         # FMU model data
@@ -67,14 +198,50 @@ class FmuDriver:
         self.fmu_var_types = {}
         self.fmu_var_causality = {}
         self.fmu_var_dims = {}
+        self.fmu_var_numel = {}  # {"fmu var": number of array elements or None}
         self.fmu_instance: FMU3Slave | FMU2Slave | None = None
 
+        # fmpy accessors of the loaded FMU bound for its FMI version
+        self._fmu_accessors = {}  # {"float": (setter, getter), ...}
+        self._supports_array_dims = False
+
+        # Per-variable FMU accessors bound once after loading the FMU
+        self._step_set_plan = {}  # {"fmu var": (setter, var ref, is_array)}
+        self._step_get_batches = []  # [(getter, [var refs], ["fmu var", ...])]
+        self._step_get_plan = []  # [("fmu var", getter, [var ref], var_dim)]
+        self._float_get_plan = []  # [(getter, [var ref], offset, var_dim)]
+        self._read_outputs_kernel = None  # generated from the get plans
+
+        # Float array variables are stored as views into one contiguous buffer
+        self._float_slices = {}  # {"fmu var": (offset, var_dim)}
+        self._float_buf = np.zeros(0, dtype=np.float64)
+
+        # Cached output message templates, built on the first publish
+        self._output_plan = None
+
         # FMU instance data
         self.start_time = 0.0  # TODO Need to get the actual start time from sim clock
         self.fmu_time = 0.0
         self.fmu_data = {}  # {"fmu var": value}
         self.in_topic_data = {}  # {"topic": {"topic var": value, ...}}
-        self.out_topic_data = {}  # {"topic": {"topic var": value, ...}}
+
+        # Received topic variables resolved to the FMU variables they are written to
+        # {("topic", "topic var"): (setter, var ref, is_array) or None if not mapped}
+        self._input_plan = {}
+        # Topic variables updated since the last step, as an insertion-ordered set
+        self._dirty_inputs = {}  # {("topic", "topic var"): None}
+        # Input messages received since the last step, drained by step_fmu. Appends
+        # and pops on a deque are thread-safe, so callbacks don't need the lock.
+        self._incoming_inputs = collections.deque()  # [("topic", {"topic var": value})]
+        # Prefixed topic variable name of each flattened message key, per topic, so
+        # every message of a topic reuses the same key strings
+        self._input_var_names = {}  # {"topic": {"flattened key": "topic var"}}
+        # Last received value of each flattened message key, per topic, so that only
+        # the values that changed are queued
+        self._last_input_values = {}  # {"topic": {"flattened key": value}}
+        # Generated flatten function of each typed input message type, or None if
+        # the type's messages are flattened generically
+        self._input_flatteners = {}  # {"type name": flatten function or None}
 
         # Track all topics that need to be subscribed to
         # Each element is a tuple representing the (msg_type, topic_name)
@@ -87,10 +254,41 @@ class FmuDriver:
         self.aux_topics_to_publish = set()
 
     def load_config(self):
+        self._output_plan = None
+        self._input_plan = {}
+        self._dirty_inputs = {}
+        self._incoming_inputs.clear()
+        self._input_var_names = {}
+        self._last_input_values = {}
         self.all_topics_to_subscribe.clear()
         self.aux_topics_to_subscribe.clear()
         self.aux_topics_to_publish.clear()
 
+        # Optional "kafka_tuning" config to adjust the librdkafka settings for this
+        # FMU's step rate, e.g. {"consumer": {"fetch.min.bytes": 1024}, "producer":
+        # {"linger.ms": 20}}. Consumer settings apply to the input topic
+        # subscription and producer settings to the outputs of this FMU only. Each
+        # step's outputs are already enqueued as one burst, so the producer defaults
+        # don't linger.
+        self._consumer_config = dict(KAFKA_CONSUMER_CONFIG)
+        self._producer_config = {}
+        if "kafka_tuning" in self.fmu_config_json:
+            kafka_tuning = self.fmu_config_json["kafka_tuning"]
+            if "consumer" in kafka_tuning:
+                self._consumer_config.update(
+                    {k: str(v) for k, v in kafka_tuning["consumer"].items()}
+                )
+            if "producer" in kafka_tuning:
+                self._producer_config = {
+                    k: str(v) for k, v in kafka_tuning["producer"].items()
+                }
+
+        # Optional "step_cpu_affinity" config with the CPU cores to pin the step
+        # thread to, e.g. [3], so that stepping doesn't compete with the Kafka
+        # consumer threads. The config is loaded by the step thread itself.
+        if "step_cpu_affinity" in self.fmu_config_json:
+            self.set_step_thread_affinity(self.fmu_config_json["step_cpu_affinity"])
+
         if "component_input_topics" in self.fmu_config_json:
             in_topics = self.fmu_config_json["component_input_topics"]
             for in_topic_info in in_topics:
@@ -116,7 +314,6 @@ class FmuDriver:
                 "fmu_aux_output_mapping"
             ].items():
                 self.aux_topics_to_publish.add(out_topic_root)
-                self.out_topic_data[out_topic_root] = {}
             # print(f"topics_to_publish = {self.topics_to_publish}")
 
     def load_fmu(self):
@@ -130,7 +327,7 @@ class FmuDriver:
             fmu_model_path = os.path.join(self.working_dir, fmu_model_path)
 
         self.fmu_filename = os.path.abspath(fmu_model_path)
-        print(f"{self.fmudriver_name} Loading FMU file: {self.fmu_filename}")
+        logger.info("%s Loading FMU file: %s", self.fmudriver_name, self.fmu_filename)
 
         # Read the model description
         # fmpy.dump(self.fmu_filename)
@@ -141,24 +338,39 @@ class FmuDriver:
             self.fmu_var_refs[var.name] = var.valueReference
             self.fmu_var_types[var.name] = var.type
             self.fmu_var_dims[var.name] = [dim.start for dim in var.dimensions]
+            # Total number of elements in the n-dimensional array, or None for
+            # scalar variables
+            self.fmu_var_numel[var.name] = (
+                functools.reduce(operator.mul, self.fmu_var_dims[var.name], 1)
+                if self.fmu_var_dims[var.name]
+                else None
+            )
             self.fmu_var_causality[var.name] = var.causality
-            print(
-                f"{self.fmudriver_name} "
-                f"FMU ref={self.fmu_var_refs[var.name]} "
-                f"var='{var.name}', "
-                f"type={self.fmu_var_types[var.name]}, "
-                f"dims={self.fmu_var_dims[var.name]}, "
-                f"causality={self.fmu_var_causality[var.name]}"
+            logger.debug(
+                "%s FMU ref=%s var='%s', type=%s, dims=%s, causality=%s",
+                self.fmudriver_name,
+                self.fmu_var_refs[var.name],
+                var.name,
+                self.fmu_var_types[var.name],
+                self.fmu_var_dims[var.name],
+                self.fmu_var_causality[var.name],
             )
 
-        # Extract the FMU
-        self.unzipped_temp_dir = fmpy.extract(
-            filename=self.fmu_filename,
-            unzipdir=os.path.join(self.working_dir, "temp_fmu_extract", self.fmu_id),
-        )  # Note: this moves CWD to the temp dir
-        os.chdir(self.working_dir)  # Set CWD back to the original working dir
-        print(f"{self.fmudriver_name} Extracted FMU to: {self.unzipped_temp_dir}")
-        print(f"{self.fmudriver_name} CWD set back to: {os.getcwd()}")
+        # Extract the FMU, reusing the extraction of a previous run if the FMU file
+        # has not changed
+        self.unzipped_temp_dir = self.get_cached_extract_dir()
+        with self.get_extract_lock(self.fmu_filename):
+            if os.path.isdir(self.unzipped_temp_dir) and os.listdir(
+                self.unzipped_temp_dir
+            ):
+                logger.info(
+                    "%s Using cached FMU extraction at: %s",
+                    self.fmudriver_name,
+                    self.unzipped_temp_dir,
+                )
+            else:
+                self.extract_fmu(self.unzipped_temp_dir)
+            self.prune_cached_extract_dirs(self.unzipped_temp_dir)
 
         if self.model_description.fmiVersion == "3.0":
             self.fmu_instance = FMU3Slave(
@@ -175,117 +387,285 @@ class FmuDriver:
                 instanceName="instance1",
             )
         else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
+            logger.error("%s Unsupported FMI version.", self.fmudriver_name)
             return
 
+        # The FMI version is fixed from here on, so bind the accessors once
+        self._fmu_accessors = {
+            kind: (
+                getattr(self.fmu_instance, setter_name),
+                getattr(self.fmu_instance, getter_name),
+            )
+            for kind, (setter_name, getter_name) in FMU_ACCESSOR_NAMES[
+                self.model_description.fmiVersion
+            ].items()
+        }
+        self._set_float, self._get_float = self._fmu_accessors["float"]
+        self._set_int, self._get_int = self._fmu_accessors["int"]
+        self._set_string, self._get_string = self._fmu_accessors["string"]
+        self._set_bool, self._get_bool = self._fmu_accessors["bool"]
+        self._supports_array_dims = self.model_description.fmiVersion == "3.0"
+
+        self.build_step_plans()
+
+    def build_step_plans(self):
+        # Resolve the type dispatch of every FMU variable once so that step_fmu
+        # only has to call the bound fmpy accessors
+        self._step_set_plan = {}
+        self._step_get_batches = []
+        self._step_get_plan = []
+        self._float_get_plan = []
+        self._float_slices = {}
+        float_buf_size = 0
+        get_batches = {}  # {getter: ([var refs], ["fmu var", ...])}
+        for fmu_var, fmu_var_type in self.fmu_var_types.items():
+            if fmu_var_type not in FMU_VAR_KINDS:
+                # TODO Handle other FMI 3.0 types
+                logger.warning(
+                    "%s Unsupported FMU variable type '%s'",
+                    self.fmudriver_name,
+                    fmu_var_type,
+                )
+                continue
+            setter, getter = self._fmu_accessors[FMU_VAR_KINDS[fmu_var_type]]
+
+            var_dim = self.fmu_var_numel[fmu_var]
+            if var_dim and not self._supports_array_dims:
+                logger.warning(
+                    "%s FMU 2.0 does not support array dimensions, ignoring array_dim for '%s'.",
+                    self.fmudriver_name,
+                    fmu_var,
+                )
+                var_dim = None
+
+            var_ref = self.fmu_var_refs[fmu_var]
+            self._step_set_plan[fmu_var] = (setter, var_ref, var_dim is not None)
+            if var_dim and fmu_var_type in ("Real", "Float64"):
+                # Float arrays are read straight into their slice of the float buffer
+                self._float_slices[fmu_var] = (float_buf_size, var_dim)
+                self._float_get_plan.append(
+                    (getter, [var_ref], float_buf_size, var_dim)
+                )
+                float_buf_size += var_dim
+            elif var_dim:
+                # Array variables are read individually with their element count
+                self._step_get_plan.append((fmu_var, getter, [var_ref], var_dim))
+            else:
+                # Scalar variables of the same type are read together in one call
+                var_refs, fmu_vars = get_batches.setdefault(getter, ([], []))
+                var_refs.append(var_ref)
+                fmu_vars.append(fmu_var)
+
+        self._step_get_batches = [
+            (getter, var_refs, fmu_vars)
+            for getter, (var_refs, fmu_vars) in get_batches.items()
+        ]
+        self._float_buf = np.zeros(float_buf_size, dtype=np.float64)
+        self._read_outputs_kernel = self.compile_read_outputs_kernel()
+
+    def compile_read_outputs_kernel(self):
+        # The output layout is fixed once the get plans are built, so generate a
+        # straight-line function with the value references and variable names
+        # inlined instead of looping over the plans on every step
+        namespace = {}
+        lines = [
+            "def read_outputs(self):",
+            "    fmu_data = self.fmu_data",
+            "    float_buf = self._float_buf",
+        ]
+        for getter, var_refs, fmu_vars in self._step_get_batches:
+            getter_name = f"getter_{len(namespace)}"
+            namespace[getter_name] = getter
+            lines.append(f"    values = {getter_name}({var_refs!r})")
+            for i, fmu_var in enumerate(fmu_vars):
+                lines.append(f"    fmu_data[{fmu_var!r}] = values[{i}]")
+        for fmu_var, getter, var_refs, var_dim in self._step_get_plan:
+            getter_name = f"getter_{len(namespace)}"
+            namespace[getter_name] = getter
+            lines.append(
+                f"    fmu_data[{fmu_var!r}] = {getter_name}({var_refs!r}, nValues={var_dim})"
+            )
+        if self._float_get_plan:
+            # The float array slices are laid out back to back in value reference
+            # order, so one call returns the whole buffer (FMI 3.0 concatenates the
+            # elements of all requested array variables)
+            getter = self._float_get_plan[0][0]
+            float_var_refs = [var_refs[0] for _, var_refs, _, _ in self._float_get_plan]
+            getter_name = f"getter_{len(namespace)}"
+            namespace[getter_name] = getter
+            lines.append(
+                f"    float_buf[:] = "
+                f"{getter_name}({float_var_refs!r}, nValues={self._float_buf.size})"
+            )
+
+        source = "\n".join(lines) + "\n"
+        exec(compile(source, f"<{self.fmudriver_name} read_outputs>", "exec"), namespace)
+        return namespace["read_outputs"]
+
     def set_fmu_float(self, fmu_var: str, value: float | list[float]):
         if type(value) is float:
-            value = [value]
-        if self.model_description.fmiVersion == "3.0":
-            self.fmu_instance.setFloat64([self.fmu_var_refs[fmu_var]], value)
-        elif self.model_description.fmiVersion == "2.0":
-            self.fmu_instance.setReal([self.fmu_var_refs[fmu_var]], value)
+            self.set_fmu_scalar(self._set_float, fmu_var, value)
         else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
+            self.set_fmu_array(self._set_float, fmu_var, value)
 
     def get_fmu_float(
         self, fmu_var: str, array_dim: int | None = None
     ) -> float | list[float]:
-        if self.model_description.fmiVersion == "3.0":
-            out_vals = self.fmu_instance.getFloat64(
-                vr=[self.fmu_var_refs[fmu_var]], nValues=array_dim
-            )
-            if not array_dim:
-                out_vals = out_vals[0]
-        elif self.model_description.fmiVersion == "2.0":
-            if array_dim:
-                print("FMU 2.0 does not support array dimensions, ignoring array_dim.")
-            out_vals = self.fmu_instance.getReal([self.fmu_var_refs[fmu_var]])[0]
-        else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
-            out_vals = 0.0
-        return out_vals
+        return self.get_fmu_values(self._get_float, fmu_var, array_dim)
 
     def set_fmu_int(self, fmu_var: str, value: int | list[int]):
         if type(value) is int:
-            value = [value]
-        if self.model_description.fmiVersion == "3.0":
-            self.fmu_instance.setInt64([self.fmu_var_refs[fmu_var]], value)
-        elif self.model_description.fmiVersion == "2.0":
-            self.fmu_instance.setInteger([self.fmu_var_refs[fmu_var]], value)
+            self.set_fmu_scalar(self._set_int, fmu_var, value)
         else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
+            self.set_fmu_array(self._set_int, fmu_var, value)
 
     def get_fmu_int(
         self, fmu_var: str, array_dim: int | None = None
     ) -> int | list[int]:
-        if self.model_description.fmiVersion == "3.0":
-            out_vals = self.fmu_instance.getInt64(
-                vr=[self.fmu_var_refs[fmu_var]], nValues=array_dim
-            )
-            if not array_dim:
-                out_vals = out_vals[0]
-
-        elif self.model_description.fmiVersion == "2.0":
-            if array_dim:
-                print("FMU 2.0 does not support array dimensions, ignoring array_dim.")
-            out_vals = self.fmu_instance.getInteger([self.fmu_var_refs[fmu_var]])[0]
-        else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
-            out_vals = 0
-        return out_vals
+        return self.get_fmu_values(self._get_int, fmu_var, array_dim)
 
     def set_fmu_string(self, fmu_var: str, value: str | list[str]):
         if type(value) is str:
-            value = [value]
-        self.fmu_instance.setString([self.fmu_var_refs[fmu_var]], value)
+            self.set_fmu_scalar(self._set_string, fmu_var, value)
+        else:
+            self.set_fmu_array(self._set_string, fmu_var, value)
 
     def get_fmu_string(
         self, fmu_var: str, array_dim: int | None = None
     ) -> str | list[str]:
-        if self.model_description.fmiVersion == "3.0":
-            out_vals = self.fmu_instance.getString(
-                vr=[self.fmu_var_refs[fmu_var]], nValues=array_dim
-            )
-            if not array_dim:
-                out_vals = out_vals[0]
-
-        elif self.model_description.fmiVersion == "2.0":
-            if array_dim:
-                print("FMU 2.0 does not support array dimensions, ignoring array_dim.")
-            out_vals = self.fmu_instance.getString([self.fmu_var_refs[fmu_var]])[0]
-        else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
-            out_vals = ""
-        return out_vals
+        return self.get_fmu_values(self._get_string, fmu_var, array_dim)
 
     def set_fmu_bool(self, fmu_var: str, value: bool | list[bool]):
         if type(value) is bool:
-            value = [value]
-        self.fmu_instance.setBoolean([self.fmu_var_refs[fmu_var]], value)
+            self.set_fmu_scalar(self._set_bool, fmu_var, value)
+        else:
+            self.set_fmu_array(self._set_bool, fmu_var, value)
 
     def get_fmu_bool(
         self, fmu_var: str, array_dim: int | None = None
     ) -> bool | list[bool]:
-        if self.model_description.fmiVersion == "3.0":
-            out_vals = self.fmu_instance.getBoolean(
-                vr=[self.fmu_var_refs[fmu_var]], nValues=array_dim
-            )
-            if not array_dim:
-                out_vals = out_vals[0]
+        return self.get_fmu_values(self._get_bool, fmu_var, array_dim)
 
-        elif self.model_description.fmiVersion == "2.0":
-            if array_dim:
-                print("FMU 2.0 does not support array dimensions, ignoring array_dim.")
-            out_vals = self.fmu_instance.getBoolean([self.fmu_var_refs[fmu_var]])[0]
-        else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
-            out_vals = False
-        return out_vals
+    def set_fmu_scalar(self, setter, fmu_var: str, value):
+        # Single-element tuples avoid building new lists for the common scalar case
+        setter((self.fmu_var_refs[fmu_var],), (value,))
+
+    def set_fmu_array(self, setter, fmu_var: str, values: list):
+        setter((self.fmu_var_refs[fmu_var],), values)
+
+    def get_fmu_values(self, getter, fmu_var: str, array_dim: int | None = None):
+        if array_dim and not self._supports_array_dims:
+            logger.warning(
+                "%s FMU 2.0 does not support array dimensions, ignoring array_dim.",
+                self.fmudriver_name,
+            )
+            array_dim = None
+        if array_dim:
+            return getter([self.fmu_var_refs[fmu_var]], nValues=array_dim)
+        return getter([self.fmu_var_refs[fmu_var]])[0]
 
     def start(self):
-        print(f"{self.fmudriver_name} Start FMU driver...")
-        print(f"{self.fmudriver_name} FMU driver is started.")
+        logger.info("%s Start FMU driver...", self.fmudriver_name)
+        self._publish_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"aerosim.fmudriver.{self.fmu_id}.publish",
+        )
+        self._step_thread = threading.Thread(
+            target=self.process_control_events,
+            name=f"aerosim.fmudriver.{self.fmu_id}.step",
+            daemon=True,
+        )
+        self._step_thread.start()
+        logger.info("%s FMU driver is started.", self.fmudriver_name)
+
+    def set_step_thread_affinity(self, cpus: list[int]):
+        if threading.current_thread() is not self._step_thread:
+            logger.warning(
+                "%s Step thread affinity can only be set from the step thread.",
+                self.fmudriver_name,
+            )
+            return
+        if not hasattr(os, "sched_setaffinity"):
+            logger.warning(
+                "%s CPU affinity is not supported on this platform.",
+                self.fmudriver_name,
+            )
+            return
+        try:
+            # PID 0 applies the affinity to the calling thread only
+            os.sched_setaffinity(0, set(cpus))
+            logger.info(
+                "%s Pinned step thread to CPUs: %s", self.fmudriver_name, sorted(cpus)
+            )
+        except OSError as e:
+            logger.warning("%s Failed to pin step thread: %s", self.fmudriver_name, e)
+
+    @classmethod
+    def get_extract_lock(cls, fmu_filename):
+        with cls._extract_locks_guard:
+            return cls._extract_locks.setdefault(fmu_filename, threading.Lock())
+
+    def get_fmu_cache_dir(self):
+        # Without a working dir, keep the extracted binaries out of the caller's CWD
+        if not self.working_dir:
+            return os.path.join(tempfile.gettempdir(), "aerosim_fmu_cache")
+        return os.path.join(os.path.abspath(self.working_dir), "fmu_cache")
+
+    def get_cached_extract_dir(self):
+        sha256 = hashlib.sha256()
+        with open(self.fmu_filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+        # Each driver gets its own copy so that FMU instances don't share the state
+        # of one loaded binary
+        return os.path.join(
+            self.get_fmu_cache_dir(), f"{sha256.hexdigest()}_{self.fmu_id}"
+        )
+
+    def is_cached_extract_dir(self, path):
+        cache_dir = self.get_fmu_cache_dir()
+        try:
+            return os.path.commonpath([cache_dir, os.path.abspath(path)]) == cache_dir
+        except ValueError:
+            # Paths on different drives have no common path
+            return False
+
+    def prune_cached_extract_dirs(self, current_dir):
+        # Remove the extractions of previous revisions of this driver's FMU, which
+        # share the FMU ID suffix but not the content hash of the current one
+        cache_dir = os.path.dirname(current_dir)
+        suffix = f"_{self.fmu_id}"
+        for entry in os.listdir(cache_dir):
+            entry_hash = entry[: -len(suffix)]
+            if (
+                entry.endswith(suffix)
+                and len(entry_hash) == 64
+                and entry != os.path.basename(current_dir)
+            ):
+                logger.info(
+                    "%s Removing stale FMU extraction at: %s",
+                    self.fmudriver_name,
+                    os.path.join(cache_dir, entry),
+                )
+                shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+
+    def extract_fmu(self, target_dir):
+        # Extract next to the cache entry first and move it into place in one step,
+        # so an interrupted extraction never leaves a partial cache entry
+        os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=os.path.dirname(target_dir))
+        # Unzip directly instead of using fmpy.extract, which changes the process CWD
+        with zipfile.ZipFile(self.fmu_filename) as fmu_zip:
+            fmu_zip.extractall(staging_dir)
+        try:
+            if os.path.isdir(target_dir):
+                # Remove an empty leftover entry so that it can be replaced
+                os.rmdir(target_dir)
+            os.replace(staging_dir, target_dir)
+        except OSError:
+            # Another process filled the cache entry first, so use that one
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        logger.info("%s Extracted FMU to: %s", self.fmudriver_name, target_dir)
 
     def init_fmu(self):
         # Instantiate the FMU
@@ -294,14 +674,13 @@ class FmuDriver:
         # Set some base default values for all FMU input/output variables (these are
         # used in initial published output at t=0 for any variables set below by
         # values specified in the "fmu_initial_vals" config)
+        self._float_buf.fill(0.0)
         for fmu_var, fmu_var_type in self.fmu_var_types.items():
-            var_dim = None  # default var_dim to None for scalar variables
-            if len(self.fmu_var_dims[fmu_var]) > 0:
-                # var_dim is the total number of elements in the n-dimensional array
-                var_dim = 1
-                for dim in self.fmu_var_dims[fmu_var]:
-                    var_dim *= dim
-            if fmu_var_type == "Real" or fmu_var_type == "Float64":
+            var_dim = self.fmu_var_numel[fmu_var]
+            if fmu_var in self._float_slices:
+                offset, size = self._float_slices[fmu_var]
+                self.fmu_data[fmu_var] = self._float_buf[offset : offset + size]
+            elif fmu_var_type == "Real" or fmu_var_type == "Float64":
                 self.fmu_data[fmu_var] = 0.0 if not var_dim else [0.0] * var_dim
             elif fmu_var_type == "Integer" or fmu_var_type == "Int64":
                 self.fmu_data[fmu_var] = 0 if not var_dim else [0] * var_dim
@@ -311,15 +690,20 @@ class FmuDriver:
                 self.fmu_data[fmu_var] = False
             else:
                 # TODO Handle other FMI 3.0 types
-                print(
-                    f"{self.fmudriver_name} WARNING: Unsupported FMU variable type '{fmu_var_type}'"
+                logger.warning(
+                    "%s Unsupported FMU variable type '%s'",
+                    self.fmudriver_name,
+                    fmu_var_type,
                 )
                 continue
 
         # Set initial values for FMU variables set in the "fmu_initial_vals" config
         for init_var, init_value in self.fmu_config_json["fmu_initial_vals"].items():
-            print(
-                f"{self.fmudriver_name} Setting initial value {init_var} = {init_value}"
+            logger.info(
+                "%s Setting initial value %s = %s",
+                self.fmudriver_name,
+                init_var,
+                init_value,
             )
             # Handle the case where the initial value is a list of values
             init_value_type = (
@@ -336,9 +720,17 @@ class FmuDriver:
             elif init_value_type is bool:
                 self.set_fmu_bool(init_var, init_value)
             else:
-                print(f"{self.fmudriver_name} Error: Unsupported initial value type.")
+                logger.error(
+                    "%s Unsupported initial value type for '%s'.",
+                    self.fmudriver_name,
+                    init_var,
+                )
                 continue
-            self.fmu_data[init_var] = init_value
+            if init_var in self._float_slices:
+                # Keep the float buffer view and copy the initial values into it
+                self.fmu_data[init_var][:] = init_value
+            else:
+                self.fmu_data[init_var] = init_value
 
         # Initialize the FMU states
         if self.model_description.fmiVersion == "3.0":
@@ -347,67 +739,85 @@ class FmuDriver:
             self.fmu_instance.setupExperiment(startTime=self.start_time)
             self.fmu_instance.enterInitializationMode()
         else:
-            print(f"{self.fmudriver_name} Error: Unsupported FMI version.")
+            logger.error("%s Unsupported FMI version.", self.fmudriver_name)
             return
 
         # Exit initialization mode to be ready to start stepping
         self.fmu_instance.exitInitializationMode()
         self.fmu_time = self.start_time
 
+    def resolve_input_var(self, in_topic, topic_var):
+        if in_topic in self.aux_topics_to_subscribe:
+            # Topics in aux_topics_to_subscribe are remapped to FMU var names from the config
+            aux_var_map = self.fmu_config_json["fmu_aux_input_mapping"][in_topic]
+            if topic_var not in aux_var_map:
+                # Skip if the topic var is an aux topic that's not mapped to an FMU var
+                return None
+            fmu_var = aux_var_map[topic_var]
+        else:
+            # Otherwise, component input topics are assumed to match FMU var names
+            fmu_var = topic_var
+
+        # Variables that are not in the FMU or have an unsupported type are skipped
+        return self._step_set_plan.get(fmu_var)
+
     def step_fmu(self, simtime_sec):
-        if not self.fmu_instance:
+        fmu_instance = self.fmu_instance
+        if not fmu_instance:
             return
+        fmu_time = self.fmu_time
 
         # ------------------------------------------------------------
         # Write inputs to the FMU from self.in_topic_data and fmu_aux_input_mapping
 
-        # Process every input topic that has been received and stored in self.in_topic_data
-        for in_topic, in_var_map in self.in_topic_data.items():
-            # print(f"{self.fmudriver_name} Processing input topic '{in_topic}'")
-            is_aux_in_topic = in_topic in self.aux_topics_to_subscribe
+        # Scalar inputs are collected per setter to write each type with one FMI call
+        scalar_inputs = {}  # {setter: ([var refs], [values])}
+        collect_scalar_input = scalar_inputs.setdefault
+
+        # Apply the input messages received since the last step
+        in_topic_data = self.in_topic_data
+        dirty_inputs = self._dirty_inputs
+        incoming_inputs = self._incoming_inputs
+        while incoming_inputs:
+            in_topic, in_vars = incoming_inputs.popleft()
+            in_topic_data[in_topic].update(in_vars)
+            for topic_var in in_vars:
+                dirty_inputs[(in_topic, topic_var)] = None
+
+        # FMU inputs keep their value between steps, so only the topic variables
+        # updated since the last step need to be written
+        input_plan = self._input_plan
+        for input_key in dirty_inputs:
+            if input_key not in input_plan:
+                # Resolve topic variables the first time they are received
+                input_plan[input_key] = self.resolve_input_var(*input_key)
+            input_entry = input_plan[input_key]
+            if input_entry is None:
+                continue
+            setter, var_ref, is_array = input_entry
+            in_topic, topic_var = input_key
+            in_value = in_topic_data[in_topic][topic_var]
+            if is_array:
+                setter((var_ref,), in_value)
+            else:
+                var_refs, values = collect_scalar_input(setter, ([], []))
+                var_refs.append(var_ref)
+                values.append(in_value)
 
-            # Process each of this topic's variables and values
-            for topic_var, in_value in in_var_map.items():
-                if (
-                    is_aux_in_topic
-                    and topic_var
-                    not in self.fmu_config_json["fmu_aux_input_mapping"][in_topic]
-                ):
-                    # Skip if the topic var is an aux topic that's not mapped to an FMU var
-                    continue
-
-                if is_aux_in_topic:
-                    # Topics in aux_topics_to_subscribe are remapped to FMU var names from the config
-                    fmu_var = self.fmu_config_json["fmu_aux_input_mapping"][in_topic][
-                        topic_var
-                    ]
-                else:
-                    # Otherwise, component input topics are assumed to match FMU var names
-                    fmu_var = topic_var
-
-                fmu_var_type = self.fmu_var_types[fmu_var]
-                if fmu_var_type == "Real" or fmu_var_type == "Float64":
-                    self.set_fmu_float(fmu_var, in_value)
-                elif fmu_var_type == "Integer" or fmu_var_type == "Int64":
-                    self.set_fmu_int(fmu_var, in_value)
-                elif fmu_var_type == "String":
-                    self.set_fmu_string(fmu_var, in_value)
-                elif fmu_var_type == "Boolean":
-                    self.set_fmu_bool(fmu_var, in_value)
-                else:
-                    # TODO Handle other FMI 3.0 types
-                    print(
-                        f"{self.fmudriver_name} WARNING: Unsupported FMU variable type '{fmu_var_type}'"
-                    )
-                    continue
+        for setter, (var_refs, values) in scalar_inputs.items():
+            setter(var_refs, values)
+        dirty_inputs.clear()
 
         # ------------------------------------------------------------
         # Do one step of the FMU
 
-        cur_step_sec = simtime_sec - self.fmu_time
+        cur_step_sec = simtime_sec - fmu_time
         if cur_step_sec < 0:
-            print(
-                f"{self.fmudriver_name} WARNING: Negative time step for simtime_sec='{simtime_sec}' fmu_time='{self.fmu_time}'"
+            logger.warning(
+                "%s Negative time step for simtime_sec='%s' fmu_time='%s'",
+                self.fmudriver_name,
+                simtime_sec,
+                fmu_time,
             )
             return
 
@@ -418,22 +828,22 @@ class FmuDriver:
                     _terminate_simulation,
                     _early_return,
                     last_successful_time,
-                ) = self.fmu_instance.doStep(
-                    currentCommunicationPoint=self.fmu_time,
+                ) = fmu_instance.doStep(
+                    currentCommunicationPoint=fmu_time,
                     communicationStepSize=cur_step_sec,
                 )
 
             elif self.model_description.fmiVersion == "2.0":
-                self.fmu_instance.doStep(
-                    currentCommunicationPoint=self.fmu_time,
+                fmu_instance.doStep(
+                    currentCommunicationPoint=fmu_time,
                     communicationStepSize=cur_step_sec,
                 )
                 _event_encountered = False  # N/A for FMI 2.0
                 _terminate_simulation = False  # N/A for FMI 2.0
                 _early_return = False  # N/A for FMI 2.0
-            last_successful_time = self.fmu_time + cur_step_sec
+            last_successful_time = fmu_time + cur_step_sec
         except Exception as e:
-            print(f"{self.fmudriver_name} ERROR: {e}")
+            logger.error("%s Failed to step FMU: %s", self.fmudriver_name, e)
             self._running = False
             return
 
@@ -446,308 +856,422 @@ class FmuDriver:
         # Read outputs from the FMU to update self.fmu_data
 
         # Store latest values for all FMU in/output variables
-        for fmu_var, fmu_var_type in self.fmu_var_types.items():
-            var_dim = None  # default var_dim to None for scalar variables
-            if len(self.fmu_var_dims[fmu_var]) > 0:
-                # var_dim is the total number of elements in the n-dimensional array
-                var_dim = 1
-                for dim in self.fmu_var_dims[fmu_var]:
-                    var_dim *= dim
-            if fmu_var_type == "Real" or fmu_var_type == "Float64":
-                self.fmu_data[fmu_var] = self.get_fmu_float(fmu_var, var_dim)
-            elif fmu_var_type == "Integer" or fmu_var_type == "Int64":
-                self.fmu_data[fmu_var] = self.get_fmu_int(fmu_var, var_dim)
-            elif fmu_var_type == "String":
-                self.fmu_data[fmu_var] = self.get_fmu_string(fmu_var, var_dim)
-            elif fmu_var_type == "Boolean":
-                self.fmu_data[fmu_var] = self.get_fmu_bool(fmu_var, var_dim)
+        self._read_outputs_kernel(self)
+
+    def build_output_plan(self):
+        # The message templates and the FMU variable backing each output field are
+        # constant for a given config, so resolve them once instead of every step
+        self._output_plan = []
+        for out_topic_info in self.fmu_config_json.get("component_output_topics", []):
+            msg_type = out_topic_info["msg_type"]
+            out_topic = out_topic_info["topic"]
+            if msg_type == "aerosim::types::FlightControlCommand":
+                out_data = aerosim_types.FlightControlCommand().to_dict()
+                var_prefix = "flight_control_command"
+            elif msg_type == "aerosim::types::AircraftEffectorCommand":
+                out_data = aerosim_types.AircraftEffectorCommand().to_dict()
+                var_prefix = "aircraft_effector_command"
+            elif msg_type == "aerosim::types::VehicleState":
+                out_data = aerosim_types.VehicleState().to_dict()
+                var_prefix = "vehicle_state"
+            elif msg_type == "aerosim::types::EffectorState":
+                out_data = aerosim_types.EffectorState().to_dict()
+                var_prefix = "effector_state"
+            elif msg_type == "aerosim::types::PrimaryFlightDisplayData":
+                out_data = aerosim_types.PrimaryFlightDisplayData().to_dict()
+                var_prefix = "primary_flight_display_data"
+            elif msg_type == "aerosim::types::TrajectoryVisualization":
+                out_data = aerosim_types.TrajectoryVisualization().to_dict()
+                var_prefix = "trajectory_visualization"
+            elif msg_type == "aerosim::types::GNSS":
+                out_data = aerosim_types.GNSS().to_dict()
+                var_prefix = "gnss"
+            elif msg_type == "aerosim::types::ADSB":
+                out_data = adsb_functions.adsb_from_gnss_data(
+                    0.0,
+                    0.0,
+                    0.0,
+                    0.0,
+                    0.0,
+                    0.0,
+                    0.0
+                ).to_dict()
+                var_prefix = "adsb"
+            elif msg_type == "aerosim::types::IMU":
+                out_data = aerosim_types.IMU().to_dict()
+                var_prefix = "imu"
             else:
-                # TODO Handle other FMI 3.0 types
-                print(
-                    f"{self.fmudriver_name} WARNING: Unsupported FMU variable type '{fmu_var_type}'"
+                logger.warning(
+                    "%s Unsupported output message type '%s'",
+                    self.fmudriver_name,
+                    msg_type,
                 )
                 continue
 
-        # Process auxiliary FMU outputs to topics
-        if "fmu_aux_output_mapping" in self.fmu_config_json:
-            for out_topic, out_var_map in self.fmu_config_json[
-                "fmu_aux_output_mapping"
-            ].items():
-                for out_topic_var, out_fmu_var in out_var_map.items():
-                    if out_fmu_var in self.fmu_data:
-                        out_val = self.fmu_data[out_fmu_var]
-                        self.out_topic_data[out_topic][out_topic_var] = out_val
-                    else:
-                        # print(
-                        #     f"{self.fmudriver_name} WARNING: FMU variable '{out_fmu_var}' not found."
-                        # )
-                        pass
+            # Override var_prefix if one is provided
+            if "var_prefix" in out_topic_info:
+                var_prefix = out_topic_info["var_prefix"]
+
+            # Resolve each FMU-backed field to the nested dict holding it so that
+            # publishing only has to assign the leaf values
+            key_pairs = []  # [(parent dict, "leaf key", "fmu var")]
+            for out_topic_var in flatten_to_dict(out_data).keys():
+                fmu_var = var_prefix + "." + out_topic_var
+                if fmu_var in self.fmu_data:
+                    *parent_keys, leaf_key = out_topic_var.split(".")
+                    parent = out_data
+                    for key in parent_keys:
+                        parent = parent[key]
+                    key_pairs.append((parent, leaf_key, fmu_var))
+                else:
+                    logger.warning(
+                        "%s Variable '%s' not found in self.fmu_data. Variables are: %s",
+                        self.fmudriver_name,
+                        out_topic_var,
+                        list(self.fmu_data.keys()),
+                    )
 
-    def publish_output_data(self, timestamp):
-        if "component_output_topics" in self.fmu_config_json:
-            output_topics = self.fmu_config_json["component_output_topics"]
-            if len(output_topics) > 0:
-                for out_topic_info in output_topics:
-                    msg_type = out_topic_info["msg_type"]
-                    out_topic = out_topic_info["topic"]
-                    out_data = {}
-                    if msg_type == "aerosim::types::FlightControlCommand":
-                        out_data = aerosim_types.FlightControlCommand().to_dict()
-                        var_prefix = "flight_control_command"
-                    elif msg_type == "aerosim::types::AircraftEffectorCommand":
-                        out_data = aerosim_types.AircraftEffectorCommand().to_dict()
-                        var_prefix = "aircraft_effector_command"
-                    elif msg_type == "aerosim::types::VehicleState":
-                        out_data = aerosim_types.VehicleState().to_dict()
-                        var_prefix = "vehicle_state"
-                    elif msg_type == "aerosim::types::EffectorState":
-                        out_data = aerosim_types.EffectorState().to_dict()
-                        var_prefix = "effector_state"
-                    elif msg_type == "aerosim::types::PrimaryFlightDisplayData":
-                        out_data = aerosim_types.PrimaryFlightDisplayData().to_dict()
-                        var_prefix = "primary_flight_display_data"
-                    elif msg_type == "aerosim::types::TrajectoryVisualization":
-                        out_data = aerosim_types.TrajectoryVisualization().to_dict()
-                        var_prefix = "trajectory_visualization"
-                    elif msg_type == "aerosim::types::GNSS":
-                        out_data = aerosim_types.GNSS().to_dict()
-                        var_prefix = "gnss"
-                    elif msg_type == "aerosim::types::ADSB":
-                        out_data = adsb_functions.adsb_from_gnss_data(
-                            0.0,
-                            0.0,
-                            0.0,
-                            0.0,
-                            0.0,
-                            0.0,
-                            0.0
-                        ).to_dict()
-                        var_prefix = "adsb"
-                    elif msg_type == "aerosim::types::IMU":
-                        out_data = aerosim_types.IMU().to_dict()
-                        var_prefix = "imu"
-                    else:
-                        print(
-                            f"{self.fmudriver_name} Warning: Unsupported output message type '{msg_type}'"
-                        )
-                        continue
+            self._output_plan.append(
+                {
+                    "msg_type": msg_type,
+                    "out_topic": out_topic,
+                    "metadata": middleware.Metadata(out_topic, msg_type),
+                    "out_data": out_data,
+                    "key_pairs": key_pairs,
+                    "last_values": None,
+                    # Typed messages are serialized from their JSON representation
+                    "serialize": functools.partial(self.serializer.from_json, msg_type),
+                }
+            )
 
-                    # print(f"Data to publish: {self.fmu_data}")
-
-                    # Override var_prefix if one is provided
-                    if "var_prefix" in out_topic_info:
-                        var_prefix = out_topic_info["var_prefix"]
-
-                    # Pack data from FMU into output message dictionary
-                    out_data_dotty = dotty(out_data)
-                    out_data_flat = flatten_to_dict(out_data)
-                    for out_topic_var, _ in out_data_flat.items():
-                        fmu_var = var_prefix + "." + out_topic_var
-                        if fmu_var in self.fmu_data:
-                            out_data_dotty[out_topic_var] = self.fmu_data[fmu_var]
-                        else:
-                            print(
-                                f"{self.fmudriver_name} WARNING: Variable '{out_topic_var}' not found in self.fmu_data."
-                            )
-                            print(f"Variables are: {self.fmu_data.keys()}")
-
-                    metadata = middleware.Metadata(
-                        out_topic, msg_type, timestamp_sim=timestamp
-                    )
-                    payload = self.serializer.from_json(
-                        msg_type, metadata, out_data_dotty.to_dict()
+        # Auxiliary FMU outputs are published as flat JsonData topics
+        # fmu_aux_output_mapping is {"topic": {"topic var": "FMU var"}}
+        aux_output_mapping = self.fmu_config_json.get("fmu_aux_output_mapping", {})
+        for out_topic in self.aux_topics_to_publish:
+            out_data = {}
+            key_pairs = []  # [(out_data, "topic var", "fmu var")]
+            for out_topic_var, out_fmu_var in aux_output_mapping[out_topic].items():
+                if out_fmu_var in self.fmu_data:
+                    key_pairs.append((out_data, out_topic_var, out_fmu_var))
+                else:
+                    logger.warning(
+                        "%s Aux output FMU variable '%s' not found in self.fmu_data.",
+                        self.fmudriver_name,
+                        out_fmu_var,
                     )
-                    self.transport.publish_raw(msg_type, out_topic, payload)
 
-        if "fmu_aux_output_mapping" in self.fmu_config_json:
-            # Publish auxiliary FMU outputs to topics
-            for out_topic in self.aux_topics_to_publish:
-                data_dict = {}
-                # Populate topic dict with latest data
-                # fmu_aux_output_mapping is {"topic": {"topic var": "FMU var"}}
-                out_var_map = self.fmu_config_json["fmu_aux_output_mapping"][out_topic]
-                for out_topic_var, out_fmu_var in out_var_map.items():
-                    if out_fmu_var in self.fmu_data:
-                        data_dict[out_topic_var] = self.fmu_data[out_fmu_var]
-                    else:
-                        print(
-                            f"WARNING: Aux output FMU variable '{out_fmu_var}' not found self.fmu_data."
-                        )
+            self._output_plan.append(
+                {
+                    # We treat auxiliary topics as JsonData because they are not tied to any specific data type.
+                    "msg_type": "aerosim::types::JsonData",
+                    "out_topic": out_topic,
+                    "metadata": middleware.Metadata(
+                        out_topic, "aerosim::types::JsonData"
+                    ),
+                    "out_data": out_data,
+                    "key_pairs": key_pairs,
+                    "last_values": None,
+                    "serialize": functools.partial(serialize_json_data, self.serializer),
+                }
+            )
 
-                # We treat auxiliary topics as JsonData because they are not tied to any specific data type.
-                msg_type = "aerosim::types::JsonData"
-                metadata = middleware.Metadata(
-                    out_topic, msg_type, timestamp_sim=timestamp
-                )
-                payload = self.serializer.serialize_message(
-                    metadata, aerosim_types.JsonData(data_dict)
-                )
-                self.transport.publish_raw(msg_type, out_topic, payload)
+    def publish_output_data(self, timestamp):
+        if self._output_plan is None:
+            self.build_output_plan()
+
+        # The previous step's messages are packed in the same output dicts, so they
+        # have to be sent before the dicts are rewritten
+        self.wait_for_pending_publish()
+
+        # Optionally skip output topics whose values haven't changed since they were
+        # last published, for consumers that only need to see changes
+        publish_only_on_change = self.fmu_config_json.get(
+            "publish_only_on_change", False
+        )
+
+        fmu_data = self.fmu_data
+        outputs_to_send = []
+        for output in self._output_plan:
+            key_pairs = output["key_pairs"]
+            values = [to_publish_value(fmu_data[fmu_var]) for _, _, fmu_var in key_pairs]
+            if publish_only_on_change and values == output["last_values"]:
+                continue
+            output["last_values"] = values
+
+            # Pack data from FMU into output message dictionary, only rewriting the
+            # fields backed by FMU variables in the cached message template
+            for (parent, leaf_key, _), value in zip(key_pairs, values):
+                parent[leaf_key] = value
+            outputs_to_send.append(output)
+
+        self._pending_publish = self._publish_executor.submit(
+            self.send_output_data, outputs_to_send, timestamp
+        )
+
+    def send_output_data(self, output_plan, timestamp):
+        # Clock ticks pass the sim time as its message dict, which is only converted
+        # here on the publish thread
+        if isinstance(timestamp, dict):
+            timestamp = aerosim_types.TimeStamp(timestamp["sec"], timestamp["nanosec"])
+
+        messages = []
+        for output in output_plan:
+            metadata = output["metadata"]
+            metadata.update_timestamps(timestamp)
+            payload = output["serialize"](metadata, output["out_data"])
+            messages.append((output["msg_type"], output["out_topic"], payload))
+
+        if messages:
+            self.transport.publish_many(messages, self._producer_config)
+
+    def wait_for_pending_publish(self):
+        if self._pending_publish is None:
+            return
+        try:
+            self._pending_publish.result()
+        except Exception as e:
+            logger.error("%s Failed to publish output data: %s", self.fmudriver_name, e)
+        self._pending_publish = None
+
+    def control_callback(self, data, metadata):
+        if not self._running:
+            return
+
+        # Hand the message over to the step thread
+        self._control_events.put((data, metadata))
+
+    def process_control_events(self):
+        control_events = self._control_events
+        while True:
+            events = [control_events.get()]
+            while not control_events.empty():
+                events.append(control_events.get_nowait())
+
+            # If the FMU fell behind the clock, step once straight to the latest of
+            # consecutive ticks instead of stepping every stale one
+            coalesce_clock_ticks = self.fmu_config_json.get(
+                "coalesce_clock_ticks", True
+            )
+            for i, event in enumerate(events):
+                if event is None:
+                    return
+                data, metadata = event
+                if metadata.topic == "aerosim.clock":
+                    if (
+                        coalesce_clock_ticks
+                        and i + 1 < len(events)
+                        and events[i + 1] is not None
+                        and events[i + 1][1].topic == "aerosim.clock"
+                    ):
+                        continue
+                    self.clock_callback(data, metadata)
+                else:
+                    self.orchestator_commands_callback(data, metadata)
 
     def orchestator_commands_callback(self, data, metadata):
         msg_data = data
         msg_topic = metadata.topic
 
-        with self._processing_callback_lock:
-            if not self._running:
-                return
+        if not self._running:
+            return
 
-            if msg_data["command"] == ("stop"):
-                print(f"{self.fmudriver_name} Received orchestrator stop command.")
-                self._running = False
-                return
+        if msg_data["command"] == ("stop"):
+            logger.info("%s Received orchestrator stop command.", self.fmudriver_name)
+            self._running = False
+            return
 
-            if (
-                not self._is_sim_config_loaded
-                and msg_topic == "aerosim.orchestrator.commands"
-            ):
-                # If the sim config hasn't been loaded yet, wait for the orchestrator load command
-                if msg_data["command"] == ("load_config"):
-                    print(f"{self.fmudriver_name} Received orchestrator load command.")
-                    # Load the FMU config into self.fmu_config_json
-                    self.fmu_config_json = {}
-                    sim_config = msg_data["parameters"]["sim_config"]
-                    for fmu_config in sim_config["fmu_models"]:
-                        if fmu_config["id"] == self.fmu_id:
-                            self.fmu_config_json = fmu_config
-                            break
-                    if not self.fmu_config_json:
-                        print(
-                            f"{self.fmudriver_name} Error: FMU ID '{self.fmu_id}' not found in sim config."
-                        )
-                        return
-
-                    # Process self.fmu_config_json
-                    self.load_config()
-
-                    # Subscribe to all of the topics specified in the sim config
-                    self.transport.subscribe_all_raw(
-                        list(self.all_topics_to_subscribe),
-                        self.input_data_callback,
+        if (
+            not self._is_sim_config_loaded
+            and msg_topic == "aerosim.orchestrator.commands"
+        ):
+            # If the sim config hasn't been loaded yet, wait for the orchestrator load command
+            if msg_data["command"] == ("load_config"):
+                logger.info(
+                    "%s Received orchestrator load command.", self.fmudriver_name
+                )
+                # Load the FMU config into self.fmu_config_json
+                self.fmu_config_json = {}
+                sim_config = msg_data["parameters"]["sim_config"]
+                for fmu_config in sim_config["fmu_models"]:
+                    if fmu_config["id"] == self.fmu_id:
+                        self.fmu_config_json = fmu_config
+                        break
+                if not self.fmu_config_json:
+                    logger.error(
+                        "%s FMU ID '%s' not found in sim config.",
+                        self.fmudriver_name,
+                        self.fmu_id,
                     )
+                    return
 
-                    # Load the FMU model file
-                    self.load_fmu()
+                # Process self.fmu_config_json
+                self.load_config()
 
-                    # After loading FMU model file to populate self.fmu_var_refs, pass
-                    # through the world origin values if the FMU has variables for it
-                    if (
-                        "world_origin_latitude" in self.fmu_var_refs
-                        and "world_origin_longitude" in self.fmu_var_refs
-                        and "world_origin_altitude" in self.fmu_var_refs
-                    ):
-                        self.fmu_config_json["fmu_initial_vals"][
-                            "world_origin_latitude"
-                        ] = sim_config["world"]["origin"]["latitude"]
+                # Subscribe to all of the topics specified in the sim config
+                self.transport.subscribe_all_raw(
+                    list(self.all_topics_to_subscribe),
+                    self.input_data_callback,
+                    self._consumer_config,
+                )
 
-                        self.fmu_config_json["fmu_initial_vals"][
-                            "world_origin_longitude"
-                        ] = sim_config["world"]["origin"]["longitude"]
+                # Load the FMU model file
+                self.load_fmu()
 
-                        self.fmu_config_json["fmu_initial_vals"][
-                            "world_origin_altitude"
-                        ] = sim_config["world"]["origin"]["altitude"]
+                # After loading FMU model file to populate self.fmu_var_refs, pass
+                # through the world origin values if the FMU has variables for it
+                if (
+                    "world_origin_latitude" in self.fmu_var_refs
+                    and "world_origin_longitude" in self.fmu_var_refs
+                    and "world_origin_altitude" in self.fmu_var_refs
+                ):
+                    self.fmu_config_json["fmu_initial_vals"][
+                        "world_origin_latitude"
+                    ] = sim_config["world"]["origin"]["latitude"]
 
-                    self._is_sim_config_loaded = True
-                else:
-                    print(
-                        f"{self.fmudriver_name} Waiting for orchestrator load command..."
-                    )
-                return
+                    self.fmu_config_json["fmu_initial_vals"][
+                        "world_origin_longitude"
+                    ] = sim_config["world"]["origin"]["longitude"]
 
-            if (
-                not self._is_sim_started
-                and msg_topic == "aerosim.orchestrator.commands"
-            ):
-                # If the sim hasn't started yet, wait for the orchestrator start command
-                if msg_data["command"] == "start":
-                    print(f"{self.fmudriver_name} Received orchestrator start command.")
-
-                    # Save sim start time from the orchestrator
-                    self.sim_start_time = aerosim_types.TimeStamp(
-                        msg_data["parameters"]["sim_start_time"]["sec"],
-                        msg_data["parameters"]["sim_start_time"]["nanosec"],
-                    )
+                    self.fmu_config_json["fmu_initial_vals"][
+                        "world_origin_altitude"
+                    ] = sim_config["world"]["origin"]["altitude"]
 
-                    initial_timestamp = metadata.timestamp_sim
+                self._is_sim_config_loaded = True
+            else:
+                logger.debug(
+                    "%s Waiting for orchestrator load command...", self.fmudriver_name
+                )
+            return
 
-                    # Initialize the FMU model instance to be ready to start stepping
-                    self.init_fmu()
+        if (
+            not self._is_sim_started
+            and msg_topic == "aerosim.orchestrator.commands"
+        ):
+            # If the sim hasn't started yet, wait for the orchestrator start command
+            if msg_data["command"] == "start":
+                logger.info(
+                    "%s Received orchestrator start command.", self.fmudriver_name
+                )
 
-                    # Publish initial value output topics for initial timestamp
-                    self.publish_output_data(initial_timestamp)
+                # Save sim start time from the orchestrator
+                self.sim_start_time = aerosim_types.TimeStamp(
+                    msg_data["parameters"]["sim_start_time"]["sec"],
+                    msg_data["parameters"]["sim_start_time"]["nanosec"],
+                )
 
-                    self._is_sim_started = True
-                else:
-                    print(
-                        f"{self.fmudriver_name} Waiting for orchestrator start command..."
-                    )
-                return
+                initial_timestamp = metadata.timestamp_sim
+
+                # Initialize the FMU model instance to be ready to start stepping
+                self.init_fmu()
+
+                # Publish initial value output topics for initial timestamp
+                self.publish_output_data(initial_timestamp)
+
+                self._is_sim_started = True
+            else:
+                logger.debug(
+                    "%s Waiting for orchestrator start command...", self.fmudriver_name
+                )
+            return
 
     def clock_callback(self, data, _):
         msg_data = data
 
-        with self._processing_callback_lock:
-            if not self._running or not self._is_sim_started:
-                return
+        if not self._running or not self._is_sim_started:
+            return
 
-            timestamp = aerosim_types.TimeStamp(
-                msg_data["timestamp_sim"]["sec"],
-                msg_data["timestamp_sim"]["nanosec"],
-            )
-            simtime_as_sec = timestamp.sec + timestamp.nanosec / 1.0e9
+        self.step_clock_tick(msg_data["timestamp_sim"])
 
-            # print(
-            #     f"{self.fmudriver_name} Received aerosim.clock message with "
-            #     f"t={simtime_sec}"
-            # )
+    def step_clock_tick(self, timestamp):
+        simtime_as_sec = timestamp["sec"] + timestamp["nanosec"] / 1.0e9
 
-            # t1 = time.time()
-            self.step_fmu(simtime_as_sec)
-            # t2 = time.time()
-            # print(f"{self.fmudriver_name} step_fmu t={(t2-t1)*1000:.1f} ms")
+        # print(
+        #     f"{self.fmudriver_name} Received aerosim.clock message with "
+        #     f"t={simtime_sec}"
+        # )
 
-            self.publish_output_data(timestamp)
+        # t1 = time.time()
+        self.step_fmu(simtime_as_sec)
+        # t2 = time.time()
+        # print(f"{self.fmudriver_name} step_fmu t={(t2-t1)*1000:.1f} ms")
+
+        self.publish_output_data(timestamp)
 
     def input_data_callback(self, payload):
-        metadata = self.serializer.deserialize_metadata(payload)
-        if metadata.type_name == "aerosim::types::JsonData":
-            data = self.serializer.deserialize_data(
-                aerosim_types.JsonData, payload
-            ).get_data()
-        else:
-            data = self.serializer.to_json(metadata.type_name, payload)
-
-        with self._processing_callback_lock:
-            if not self._running:
-                return
-
-            var_prefix = ""
-            if metadata.topic not in self.aux_topics_to_subscribe:
-                if metadata.type_name == "aerosim::types::VehicleState":
-                    var_prefix = "vehicle_state."
-                elif metadata.type_name == "aerosim::types::EffectorState":
-                    var_prefix = "effector_state."
-                elif metadata.type_name == "aerosim::types::AutopilotCommand":
-                    var_prefix = "autopilot_command."
-                elif metadata.type_name == "aerosim::types::FlightControlCommand":
-                    var_prefix = "flight_control_command."
-                elif metadata.type_name == "aerosim::types::AircraftEffectorCommand":
-                    var_prefix = "aircraft_effector_command."
-                elif metadata.type_name == "aerosim::types::PrimaryFlightDisplayData":
-                    var_prefix = "primary_flight_display_data."
-
-            # Save data from input topic as flattened dict
+        # Kafka messages are JSON encoded, so decode the metadata and data in one
+        # pass instead of deserializing them separately through the typed serializer
+        message = orjson.loads(payload)
+        in_topic = message["metadata"]["topic"]
+        type_name = message["metadata"]["type_name"]
+        data = message["data"]
+        if type_name == "aerosim::types::JsonData":
+            # JsonData wraps its contents as a JSON string
+            data = orjson.loads(data["data"])
+
+        if not self._running:
+            return
+
+        var_names = self._input_var_names.get(in_topic)
+        if var_names is None:
+            var_names = self._input_var_names.setdefault(in_topic, {})
+        last_values = self._last_input_values.get(in_topic)
+        if last_values is None:
+            last_values = self._last_input_values.setdefault(in_topic, {})
+        var_prefix = None
+        missing = object()
+
+        # Queue the values that changed since the previous message of the input
+        # topic as flattened dict to be applied by step_fmu
+        msg_data_flattened = None
+        if type_name != "aerosim::types::JsonData":
+            flattener = self._input_flatteners.get(type_name, missing)
+            if flattener is missing:
+                flattener = compile_flattener(data)
+                self._input_flatteners[type_name] = flattener
+            if flattener is not None:
+                try:
+                    msg_data_flattened = flattener(data)
+                except (KeyError, TypeError):
+                    # The message doesn't match the sampled shape
+                    msg_data_flattened = None
+                if msg_data_flattened is None:
+                    logger.debug(
+                        "%s Message on topic %s doesn't match the fields of the first %s message, flattening it generically",
+                        self.fmudriver_name,
+                        in_topic,
+                        type_name,
+                    )
+        if msg_data_flattened is None:
             msg_data_flattened = flatten_to_dict(data)
-            for in_topic_var, in_val in msg_data_flattened.items():
-                self.in_topic_data[metadata.topic][var_prefix + in_topic_var] = in_val
+        in_vars = {}
+        for in_topic_var, in_val in msg_data_flattened.items():
+            if last_values.get(in_topic_var, missing) == in_val:
+                continue
+            last_values[in_topic_var] = in_val
+
+            topic_var = var_names.get(in_topic_var)
+            if topic_var is None:
+                if var_prefix is None:
+                    var_prefix = ""
+                    if in_topic not in self.aux_topics_to_subscribe:
+                        var_prefix = INPUT_VAR_PREFIXES.get(type_name, "")
+                topic_var = sys.intern(var_prefix + in_topic_var)
+                var_names[in_topic_var] = topic_var
+            in_vars[topic_var] = in_val
+        if in_vars:
+            self._incoming_inputs.append((in_topic, in_vars))
 
     def stop(self):
-        print(f"{self.fmudriver_name} Stop fmu driver")
+        logger.info("%s Stop fmu driver", self.fmudriver_name)
         self._is_sim_started = False
 
-        with self._processing_callback_lock:
-            self._running = False
+        self._running = False
+
+        # Stop the step thread after the events already queued
+        self._control_events.put(None)
+        if self._step_thread is not None:
+            self._step_thread.join()
+            self._step_thread = None
 
         # Stop kafka thread first to stop stepping FMU before terminating it
         if self.fmu_instance is not None:
@@ -755,9 +1279,23 @@ class FmuDriver:
                 self.fmu_instance.terminate()
                 self.fmu_instance.freeInstance()
             except Exception as e:
-                print(f"Warning: Error when terminating FMU instance: {e}")
+                logger.warning(
+                    "%s Error when terminating FMU instance: %s", self.fmudriver_name, e
+                )
         self.fmu_instance = None
 
+        # Deliver any outputs still lingering in the producer queue
+        self.wait_for_pending_publish()
+        if self._publish_executor is not None:
+            self._publish_executor.shutdown(wait=True)
+            self._publish_executor = None
+        try:
+            self.transport.flush()
+        except RuntimeError as e:
+            logger.warning(
+                "%s Error when flushing Kafka producer: %s", self.fmudriver_name, e
+            )
+
         self.reset_data()
 
-        print(f"{self.fmudriver_name} Fmu driver is stopped")
+        logger.info("%s Fmu driver is stopped", self.fmudriver_name)
@@ -7,7 +7,12 @@ from .core.config import SimConfig
 from .io.websockets import start_websocket_servers
 from .io.input import InputHandler, KeyboardHandler, GamepadHandler
 from .visualization import CameraManager, FlightDisplayManager
-from .utils import clamp, normalize_heading_deg, distance_m_bearing_deg
+from .utils import (
+    clamp,
+    normalize_heading_deg,
+    distance_m_bearing_deg,
+    distance_m_bearing_deg_vec,
+)
 
 __all__ = [
     "AeroSim",
@@ -20,5 +25,6 @@ __all__ = [
     "FlightDisplayManager",
     "clamp",
     "normalize_heading_deg",
-    "distance_m_bearing_deg"
+    "distance_m_bearing_deg",
+    "distance_m_bearing_deg_vec"
 ]
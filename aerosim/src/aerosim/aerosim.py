@@ -1,34 +1,42 @@
-import json
 import os
-import time
+import threading
+
+import orjson
 
 # AeroSim packages
 import aerosim_world
 from aerosim_data import middleware
 from aerosim_data import types as aerosim_types
 
+from .core.config import load_config_json
+
 
 class AeroSim:
     def __init__(self) -> None:
         self.sim_config_json = None
         self.aerosim_orchestrator = None
         self.aerosim_fmudrivers = []
-        self.is_sim_started = False
+        self._sim_started_event = threading.Event()
         self.simclock_msg = None
         self.transport = middleware.get_transport("kafka")
 
+    @property
+    def is_sim_started(self) -> bool:
+        return self._sim_started_event.is_set()
+
     def run(
         self,
         sim_config_file: str,
-        sim_config_dir: str = os.getcwd(),
+        sim_config_dir: str | None = None,
         wait_for_sim_start: bool = True,
     ):
         # ----------------------------------------------
         # Load the sim configuration
+        if sim_config_dir is None:
+            sim_config_dir = os.getcwd()
         sim_config_path = os.path.abspath(os.path.join(sim_config_dir, sim_config_file))
         print(f"Loading simulation configuration from {sim_config_path}...")
-        with open(sim_config_path, "r") as file:
-            self.sim_config_json = json.load(file)
+        self.sim_config_json = load_config_json(sim_config_path)
 
         # print("Simulation configuration loaded:")
         # print(json.dumps(self.sim_config_json, indent=4))
@@ -56,7 +64,7 @@ class AeroSim:
         # Load orchestrator first because it creates the topics
         print("Loading AeroSim Orchestrator...")
         try:
-            self.aerosim_orchestrator.load(json.dumps(self.sim_config_json))
+            self.aerosim_orchestrator.load(orjson.dumps(self.sim_config_json).decode())
         except Exception as exc:
             print(f"Error loading AeroSim Orchestrator: {exc}")
             raise exc
@@ -73,13 +81,10 @@ class AeroSim:
             self.aerosim_orchestrator.start()
             if wait_for_sim_start:
                 start_timeout_sec = 60
-                start_time = time.time()
-                while not self.is_sim_started:
-                    if time.time() - start_time > start_timeout_sec:
-                        raise TimeoutError(
-                            f"Simulation did not start after {start_timeout_sec} seconds."
-                        )
-                    time.sleep(0.1)
+                if not self._sim_started_event.wait(start_timeout_sec):
+                    raise TimeoutError(
+                        f"Simulation did not start after {start_timeout_sec} seconds."
+                    )
         except KeyboardInterrupt as exc:
             print("KeyboardInterrupt: Stopping simulation...")
             self.stop()
@@ -95,8 +100,8 @@ class AeroSim:
         print("Finished.")
 
     def on_sim_clock_step(self, data, _):
-        self.is_sim_started = True
         self.simclock_msg = data
+        self._sim_started_event.set()
 
     def get_sim_time(self) -> dict | None:
         if self.simclock_msg is None:
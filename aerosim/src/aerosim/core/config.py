@@ -4,10 +4,39 @@ Configuration handling for AeroSim.
 This module provides utilities for loading, validating, and managing simulation configurations.
 """
 
+import functools
 import os
 import json
 from typing import Dict, Any, Optional, List
 
+import orjson
+
+
+@functools.lru_cache(maxsize=8)
+def read_config_file(config_path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read the raw contents of a configuration file.
+
+    Results are cached by path, modification time and size, so repeated loads of
+    an unchanged file don't read it again.
+    """
+    with open(config_path, "rb") as file:
+        return file.read()
+
+
+def load_config_json(config_path: str) -> Dict[str, Any]:
+    """
+    Load a JSON configuration file as a new dictionary.
+
+    Args:
+        config_path: Path to the configuration file
+
+    Returns:
+        The parsed configuration
+    """
+    stat = os.stat(config_path)
+    return orjson.loads(read_config_file(config_path, stat.st_mtime_ns, stat.st_size))
+
 
 class SimConfig:
     """
@@ -16,15 +45,15 @@ class SimConfig:
     This class provides utilities for loading, validating, and managing simulation configurations.
     """
     
-    def __init__(self, config_file: Optional[str] = None, config_dir: str = os.getcwd()) -> None:
+    def __init__(self, config_file: Optional[str] = None, config_dir: Optional[str] = None) -> None:
         """
         Initialize the simulation configuration.
         
         Args:
             config_file: Path to the simulation configuration file
-            config_dir: Directory containing the simulation configuration file
+            config_dir: Directory containing the simulation configuration file, defaults to the current working directory
         """
-        self.config_dir = config_dir
+        self.config_dir = config_dir if config_dir is not None else os.getcwd()
         self.config_json = None
         
         if config_file:
@@ -43,8 +72,7 @@ class SimConfig:
         config_path = os.path.abspath(os.path.join(self.config_dir, config_file))
         print(f"Loading simulation configuration from {config_path}...")
         
-        with open(config_path, "r") as file:
-            self.config_json = json.load(file)
+        self.config_json = load_config_json(config_path)
         
         return self.config_json
     
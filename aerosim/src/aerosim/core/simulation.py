@@ -5,15 +5,18 @@ This module contains the enhanced AeroSim class that provides the main simulatio
 """
 
 import os
-import json
 import asyncio
-import time
+import threading
+
+import orjson
 
 # AeroSim packages
 import aerosim_world
 from aerosim_data import middleware
 from aerosim_data import types as aerosim_types
 
+from .config import load_config_json
+
 class AeroSim:
     """
     Enhanced AeroSim simulation class.
@@ -34,25 +37,33 @@ class AeroSim:
         self.aerosim_fmudrivers = []
         self.enable_websockets = enable_websockets
         self.websocket_tasks = []
-        self.is_sim_started = False
+        self._sim_started_event = threading.Event()
         self.simclock_msg = None
         self.transport = middleware.get_transport("kafka")
 
-    def run(self, sim_config_file: str, sim_config_dir: str = os.getcwd(), wait_for_sim_start: bool = True) -> None:
+    @property
+    def is_sim_started(self) -> bool:
+        """
+        Whether a simulation clock message has been received.
+        """
+        return self._sim_started_event.is_set()
+
+    def run(self, sim_config_file: str, sim_config_dir: str | None = None, wait_for_sim_start: bool = True) -> None:
         """
         Run the AeroSim simulation.
 
         Args:
             sim_config_file: Path to the simulation configuration file
-            sim_config_dir: Directory containing the simulation configuration file
+            sim_config_dir: Directory containing the simulation configuration file, defaults to the current working directory
             wait_for_sim_start: Whether to wait for the simulation to start before returning
         """
         # ----------------------------------------------
         # Load the sim configuration
+        if sim_config_dir is None:
+            sim_config_dir = os.getcwd()
         sim_config_path = os.path.abspath(os.path.join(sim_config_dir, sim_config_file))
         print(f"Loading simulation configuration from {sim_config_path}...")
-        with open(sim_config_path, "r") as file:
-            self.sim_config_json = json.load(file)
+        self.sim_config_json = load_config_json(sim_config_path)
 
         # ----------------------------------------------
         # Initialize AeroSim components
@@ -78,7 +89,7 @@ class AeroSim:
         # Load orchestrator first because it creates the topics
         print("Loading AeroSim Orchestrator...")
         try:
-            self.aerosim_orchestrator.load(json.dumps(self.sim_config_json))
+            self.aerosim_orchestrator.load(orjson.dumps(self.sim_config_json).decode())
         except Exception as exc:
             print(f"Error loading AeroSim Orchestrator: {exc}")
             raise exc
@@ -95,13 +106,10 @@ class AeroSim:
             self.aerosim_orchestrator.start()
             if wait_for_sim_start:
                 start_timeout_sec = 60
-                start_time = time.time()
-                while not self.is_sim_started:
-                    if time.time() - start_time > start_timeout_sec:
-                        raise TimeoutError(
-                            f"Simulation did not start after {start_timeout_sec} seconds."
-                        )
-                    time.sleep(0.1)
+                if not self._sim_started_event.wait(start_timeout_sec):
+                    raise TimeoutError(
+                        f"Simulation did not start after {start_timeout_sec} seconds."
+                    )
         except KeyboardInterrupt as exc:
             print("KeyboardInterrupt: Stopping simulation...")
             self.stop()
@@ -110,7 +118,7 @@ class AeroSim:
             print(f"Error starting AeroSim Orchestrator: {exc}")
             raise exc
 
-    async def run_with_websockets(self, sim_config_file: str, sim_config_dir: str = os.getcwd(), wait_for_sim_start: bool = True) -> None:
+    async def run_with_websockets(self, sim_config_file: str, sim_config_dir: str | None = None, wait_for_sim_start: bool = True) -> None:
         """
         Run the AeroSim simulation with WebSockets support.
 
@@ -118,7 +126,7 @@ class AeroSim:
 
         Args:
             sim_config_file: Path to the simulation configuration file
-            sim_config_dir: Directory containing the simulation configuration file
+            sim_config_dir: Directory containing the simulation configuration file, defaults to the current working directory
             wait_for_sim_start: Whether to wait for the simulation to start before returning
         """
         from ..io.websockets import start_websocket_servers
@@ -161,8 +169,8 @@ class AeroSim:
             data: The simulation clock data
             _: Unused topic parameter
         """
-        self.is_sim_started = True
         self.simclock_msg = data
+        self._sim_started_event.set()
 
     def get_sim_time(self) -> dict | None:
         """
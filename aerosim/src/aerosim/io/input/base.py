@@ -4,8 +4,33 @@ Base input handler for AeroSim.
 This module provides the base class for handling input from various sources.
 """
 
+import logging
 from typing import Callable, Optional
 
+logger = logging.getLogger("aerosim.input")
+
+# Sources that can send commands
+VALID_COMMAND_SOURCES = frozenset({"keyboard", "gamepad", "remote"})
+
+# Names of the commands accepted from any source
+VALID_COMMANDS = frozenset(
+    {
+        "power_cmd",
+        "roll_cmd",
+        "pitch_cmd",
+        "yaw_cmd",
+        "thrust_tilt_cmd",
+        "flap_cmd",
+        "speedbrake_cmd",
+        "landing_gear_cmd",
+        "wheel_steer_cmd",
+        "wheel_brake_cmd",
+        "airspeed_setpoint_kts",
+        "heading_setpoint_deg",
+        "altitude_setpoint_ft",
+    }
+)
+
 
 class InputHandler:
     """
@@ -33,7 +58,7 @@ class InputHandler:
             value: Command value
             source: Command source (e.g., "keyboard", "gamepad")
         """
-        print(f"Processing command: {command}, value: {value}, source: {source}")
+        logger.debug("Processing command: %s, value: %s, source: %s", command, value, source)
         
         # Call the command callback if provided
         if self.command_callback:
@@ -52,34 +77,18 @@ class InputHandler:
             True if the command is valid, False otherwise
         """
         # Validate command source
-        if source not in ["keyboard", "gamepad", "remote"]:
-            print(f"Invalid command source: {source}")
+        if source not in VALID_COMMAND_SOURCES:
+            logger.warning("Invalid command source: %s", source)
             return False
         
         # Validate command name
-        valid_commands = [
-            "power_cmd",
-            "roll_cmd",
-            "pitch_cmd",
-            "yaw_cmd",
-            "thrust_tilt_cmd",
-            "flap_cmd",
-            "speedbrake_cmd",
-            "landing_gear_cmd",
-            "wheel_steer_cmd",
-            "wheel_brake_cmd",
-            "airspeed_setpoint_kts",
-            "heading_setpoint_deg",
-            "altitude_setpoint_ft",
-        ]
-        
-        if command not in valid_commands:
-            print(f"Invalid command: {command}")
+        if command not in VALID_COMMANDS:
+            logger.warning("Invalid command: %s", command)
             return False
         
         # Validate command value
         if not isinstance(value, (int, float)):
-            print(f"Invalid command value: {value}")
+            logger.warning("Invalid command value: %s", value)
             return False
         
         return True
@@ -4,6 +4,9 @@ Gamepad input handler for AeroSim.
 This module provides utilities for handling gamepad input.
 """
 
+import time
+
+import numpy as np
 import pygame
 from typing import Callable, Optional
 
@@ -17,12 +20,15 @@ class GamepadHandler(InputHandler):
     This class provides utilities for handling gamepad input for flight control.
     """
 
-    def __init__(self, command_callback: Optional[Callable] = None) -> None:
+    def __init__(
+        self, command_callback: Optional[Callable] = None, tick_hz: float = 60.0
+    ) -> None:
         """
         Initialize the gamepad input handler.
 
         Args:
             command_callback: Callback function to be called when a command is processed
+            tick_hz: Maximum rate at which the coalesced commands are sent
         """
         super().__init__(command_callback)
 
@@ -33,14 +39,8 @@ class GamepadHandler(InputHandler):
         # Initialize joystick module
         pygame.joystick.init()
 
-        # Store joystick
+        # Store joystick, connected once the mappings are defined
         self.joystick = None
-        if pygame.joystick.get_count() > 0:
-            self.joystick = pygame.joystick.Joystick(0)
-            self.joystick.init()
-            print(f"Connected to joystick: {self.joystick.get_name()}")
-        else:
-            print("No joystick connected.")
 
         # Define axis mappings (for Xbox controller)
         self.axis_map = [
@@ -78,6 +78,57 @@ class GamepadHandler(InputHandler):
         # Define step value for button inputs
         self.button_step = 0.02
 
+        # Commands read by update() are coalesced per command name and sent at most
+        # once per tick, while handle_axis() and handle_button() send them immediately
+        self.tick_period = 1.0 / tick_hz
+        self._last_flush_time = 0.0
+        self._pending_commands = {}  # {"command": value}
+        self._coalesced_values = {}  # {"command": [value, ...]}
+
+        # Lookup tables from axis/button index to its mappings. Scale factors are
+        # applied when an axis is read, so that changes to them take effect.
+        self._axis_lut = {
+            axis_idx: (command, direction)
+            for command, axis_idx, direction in self.axis_map
+        }
+        self._button_lut = {}  # {button index: [(command, direction), ...]}
+        for command, button_idx, direction in self.button_map:
+            self._button_lut.setdefault(button_idx, []).append((command, direction))
+
+        # Axis mappings as arrays, so that all axes are processed in one NumPy pass
+        self._axis_commands = [command for command, _, _ in self.axis_map]
+        self._axis_indices = np.array([axis_idx for _, axis_idx, _ in self.axis_map])
+        self._axis_directions = np.array(
+            [direction for _, _, direction in self.axis_map], dtype=np.float64
+        )
+
+        # Mapped axes and buttons that the connected joystick has, set on connection
+        self._valid_axes = np.zeros(len(self.axis_map), dtype=bool)
+        self._valid_axis_indices = []
+        self._valid_buttons = []
+
+        if pygame.joystick.get_count() > 0:
+            self.connect_joystick()
+        else:
+            print("No joystick connected.")
+
+    def connect_joystick(self) -> None:
+        """
+        Connect to the first joystick and find which of the mapped axes and buttons it has.
+        """
+        self.joystick = pygame.joystick.Joystick(0)
+        self.joystick.init()
+        print(f"Connected to joystick: {self.joystick.get_name()}")
+
+        # The number of axes and buttons doesn't change while connected
+        num_axes = self.joystick.get_numaxes()
+        num_buttons = self.joystick.get_numbuttons()
+        self._valid_axes = self._axis_indices < num_axes
+        self._valid_axis_indices = self._axis_indices[self._valid_axes].tolist()
+        self._valid_buttons = [
+            button_idx for button_idx in self._button_lut if button_idx < num_buttons
+        ]
+
     def handle_axis(self, axis: int, value: float) -> None:
         """
         Handle a joystick axis event.
@@ -87,24 +138,71 @@ class GamepadHandler(InputHandler):
             value: Axis value (-1.0 to 1.0)
         """
         # Find the command for this axis
-        for command, axis_idx, direction in self.axis_map:
-            if axis == axis_idx:
-                # Apply deadzone
-                if abs(value) < self.deadzone:
-                    value = 0.0
+        mapping = self._axis_lut.get(axis)
+        if mapping is not None:
+            command, direction = mapping
+            scale = direction * self.scale_factors.get(command, 1.0)
+            self.dispatch_axis(command, scale, value)
+
+    def dispatch_axis(self, command: str, scale: float, value: float) -> None:
+        """
+        Send the command of a mapped joystick axis if its value changed significantly.
 
-                # Apply direction and scale factor
-                scaled_value = value * direction * self.scale_factors.get(command, 1.0)
+        Args:
+            command: Command name
+            scale: Direction of the axis mapping multiplied by its scale factor
+            value: Axis value (-1.0 to 1.0)
+        """
+        # Apply deadzone
+        if abs(value) < self.deadzone:
+            value = 0.0
+
+        # Apply direction and scale factor
+        scaled_value = value * scale
+
+        # Only send if the value has changed significantly
+        if (
+            command not in self.last_values
+            or abs(self.last_values[command] - scaled_value) > 0.05
+        ):
+            self.last_values[command] = scaled_value
+            self.process_command(command, scaled_value, "gamepad")
+
+    def queue_command(self, command: str, value: float, step: bool = False) -> None:
+        """
+        Queue a command to be sent at the end of the current tick.
+
+        Args:
+            command: Command name
+            value: Command value, replacing any value already queued for the command
+            step: True if the value is an increment to add to the queued value
+        """
+        if step and command in self._pending_commands:
+            value += self._pending_commands[command]
+        self._pending_commands[command] = value
+        self._coalesced_values.setdefault(command, []).append(value)
 
-                # Only send if the value has changed significantly
-                if (
-                    command not in self.last_values
-                    or abs(self.last_values[command] - scaled_value) > 0.05
-                ):
-                    self.last_values[command] = scaled_value
-                    self.process_command(command, scaled_value, "gamepad")
+    def get_coalesced(self, command: str) -> list[float]:
+        """
+        Get the intermediate values of a command that were coalesced in this tick.
 
-                break
+        Args:
+            command: Command name
+
+        Returns:
+            The queued values of the command in order, the last one being the sent value
+        """
+        return list(self._coalesced_values.get(command, ()))
+
+    def flush_commands(self) -> None:
+        """
+        Send the commands queued since the last flush, once per command.
+        """
+        pending_commands = self._pending_commands
+        for command, value in pending_commands.items():
+            self.process_command(command, value, "gamepad")
+        pending_commands.clear()
+        self._coalesced_values.clear()
 
     def handle_button(self, button: int, pressed: bool) -> None:
         """
@@ -114,15 +212,14 @@ class GamepadHandler(InputHandler):
             button: Button index
             pressed: True if the button was pressed, False if released
         """
-        # Find the command for this button
-        for command, button_idx, direction in self.button_map:
-            if button == button_idx:
-                # Only process if the button is pressed
-                if pressed:
-                    value = direction * self.button_step
-                    self.process_command(command, value, "gamepad")
+        # Only process if the button is pressed
+        if not pressed:
+            return
 
-                break
+        # Find the commands for this button
+        for command, direction in self._button_lut.get(button, ()):
+            value = direction * self.button_step
+            self.process_command(command, value, "gamepad")
 
     def update(self) -> bool:
         """
@@ -133,31 +230,68 @@ class GamepadHandler(InputHandler):
         Returns:
             True if the update was successful, False if the application should exit
         """
-        # Process pygame events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
+        # Update the joystick state without building the list of pending events
+        pygame.event.pump()
+        if pygame.event.peek(pygame.QUIT):
+            pygame.quit()
+            return False
+        # Joystick state is read directly, so drain the queue to keep it from filling up
+        pygame.event.clear()
 
         # If no joystick is connected, try to connect one
         if self.joystick is None:
             if pygame.joystick.get_count() > 0:
-                self.joystick = pygame.joystick.Joystick(0)
-                self.joystick.init()
-                print(f"Connected to joystick: {self.joystick.get_name()}")
+                self.connect_joystick()
             else:
                 return True
 
-        # Process joystick axes
-        for command, axis_idx, direction in self.axis_map:
-            if axis_idx < self.joystick.get_numaxes():
-                value = self.joystick.get_axis(axis_idx)
-                self.handle_axis(axis_idx, value)
+        # Process joystick axes, applying the deadzone, scale and change detection to
+        # all axes at once and only sending the ones that changed significantly
+        joystick = self.joystick
+        valid_axes = self._valid_axes
+        valid_axis_indices = self._valid_axis_indices
+        raw_values = np.zeros(len(valid_axes))
+        raw_values[valid_axes] = np.fromiter(
+            (joystick.get_axis(axis_idx) for axis_idx in valid_axis_indices),
+            dtype=np.float64,
+            count=len(valid_axis_indices),
+        )
+        raw_values[np.abs(raw_values) < self.deadzone] = 0.0
+        scale_factors = self.scale_factors
+        axis_scales = self._axis_directions * np.fromiter(
+            (scale_factors.get(command, 1.0) for command in self._axis_commands),
+            dtype=np.float64,
+            count=len(self._axis_commands),
+        )
+        scaled_values = raw_values * axis_scales
+        # Last sent value of each mapped axis, NaN until the first one is sent
+        last_values = self.last_values
+        last_scaled_axes = np.fromiter(
+            (last_values.get(command, np.nan) for command in self._axis_commands),
+            dtype=np.float64,
+            count=len(self._axis_commands),
+        )
+        changed = valid_axes & (
+            np.isnan(last_scaled_axes)
+            | (np.abs(scaled_values - last_scaled_axes) > 0.05)
+        )
+        for i in np.flatnonzero(changed).tolist():
+            command = self._axis_commands[i]
+            scaled_value = float(scaled_values[i])
+            last_values[command] = scaled_value
+            self.queue_command(command, scaled_value)
+
+        # Process joystick buttons, queuing the steps of the pressed ones
+        for button_idx in self._valid_buttons:
+            if joystick.get_button(button_idx):
+                for command, direction in self._button_lut[button_idx]:
+                    value = direction * self.button_step
+                    self.queue_command(command, value, step=True)
 
-        # Process joystick buttons
-        for command, button_idx, direction in self.button_map:
-            if button_idx < self.joystick.get_numbuttons():
-                pressed = self.joystick.get_button(button_idx)
-                self.handle_button(button_idx, pressed)
+        # Send the commands coalesced since the last tick
+        now = time.monotonic()
+        if now - self._last_flush_time >= self.tick_period:
+            self._last_flush_time = now
+            self.flush_commands()
 
         return True
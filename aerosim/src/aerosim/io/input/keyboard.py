@@ -44,6 +44,9 @@ class KeyboardHandler(InputHandler):
         self.AIRSPEED_STEP = 5.0  # kts
         self.ALTITUDE_STEP = 50.0  # ft
         self.HEADING_STEP = 5.0  # deg
+
+        # Pressed state of each mapped key at the last update, to detect key presses
+        self._prev_pressed = {key: False for key in self.key_map}
         
     def handle_key_event(self, key: int, pressed: bool) -> None:
         """
@@ -77,11 +80,21 @@ class KeyboardHandler(InputHandler):
         
         This method should be called in the main loop to process keyboard events.
         """
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                self.handle_key_event(event.key, True)
-            elif event.type == pygame.QUIT:
-                pygame.quit()
-                return False
+        # Update the keyboard state without building the list of pending events
+        pygame.event.pump()
+        if pygame.event.peek(pygame.QUIT):
+            pygame.quit()
+            return False
+        # Key state is read directly, so drain the queue to keep it from filling up
+        pygame.event.clear()
+
+        # Handle the mapped keys that were pressed since the last update
+        keys = pygame.key.get_pressed()
+        prev_pressed = self._prev_pressed
+        for key in prev_pressed:
+            pressed = keys[key]
+            if pressed and not prev_pressed[key]:
+                self.handle_key_event(key, True)
+            prev_pressed[key] = pressed
         
         return True
@@ -5,16 +5,207 @@ This module provides a WebSocket server for handling control commands from aeros
 """
 
 import asyncio
-import json
-import traceback
-from typing import Set, Dict, Any, Optional, Callable, Deque
-from collections import deque
+import logging
+import threading
+import time
+from typing import Set, Dict, Any, List, Optional, Callable, Union
+from collections import OrderedDict
 from dataclasses import dataclass
 from websockets import WebSocketServerProtocol
 import websockets
+import orjson
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Logging filter that limits how often each message is logged.
+
+    At most `burst` records with the same message template are let through
+    per `interval` seconds. The first record of the next interval reports
+    how many were dropped. Logger filters only run for enabled levels, so
+    disabled per-message logging still costs only the level check.
+    """
+
+    def __init__(self, interval: float = 1.0, burst: int = 10) -> None:
+        """
+        Initialize the filter.
+
+        Args:
+            interval: Length of the rate limiting interval in seconds
+            burst: Maximum number of records of a message per interval
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        # {message template: [interval start time, records in interval, dropped]}
+        self._counts: Dict[Any, List[Any]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        counts = self._counts.get(record.msg)
+        if counts is None or now - counts[0] >= self.interval:
+            dropped = counts[2] if counts is not None else 0
+            self._counts[record.msg] = [now, 1, 0]
+            if dropped and isinstance(record.args, tuple):
+                record.msg = f"{record.msg} (%d similar messages dropped)"
+                record.args = record.args + (dropped,)
+            return True
+        if counts[1] < self.burst:
+            counts[1] += 1
+            return True
+        counts[2] += 1
+        return False
+
+
+logger = logging.getLogger("aerosim.websockets.command")
+# A fast command stream or a misbehaving client can send many messages per
+# second, so rate limit the per-message logs
+logger.addFilter(RateLimitFilter())
+
+# Maximum number of already received messages processed in one batch
+COMMAND_BATCH_SIZE = 64
+
+
+# Sources that can send commands
+VALID_COMMAND_SOURCES = frozenset({"gamepad", "keyboard"})
+
+# Names of the control parameters that can be commanded
+VALID_COMMANDS = frozenset(
+    {
+        "power_cmd",
+        "roll_cmd",
+        "pitch_cmd",
+        "yaw_cmd",
+        "thrust_tilt_cmd",
+        "flap_cmd",
+        "speedbrake_cmd",
+        "landing_gear_cmd",
+        "wheel_steer_cmd",
+        "wheel_brake_cmd",
+        "airspeed_setpoint_kts",
+        "heading_setpoint_deg",
+        "altitude_setpoint_ft",
+        "manual_override",
+        "left_stick_x",
+        "left_stick_y",
+        "right_stick_x",
+        "right_stick_y",
+    }
+)
+
+# Commands that carry an absolute position, so only their latest value matters.
+# The other commands are increments and every one of them must be applied.
+COALESCED_COMMANDS = frozenset(
+    {
+        "left_stick_x",
+        "left_stick_y",
+        "right_stick_x",
+        "right_stick_y",
+    }
+)
+
+
+class CommandQueue:
+    """
+    Thread-safe queue of received commands that coalesces stick axis commands.
+
+    A new value of a command in COALESCED_COMMANDS replaces the queued one in
+    place, so a fast stream of axis updates can't push increment commands
+    like button presses out of the queue. It supports the deque operations
+    used by consumers: len(), append(), pop() and popleft().
+    """
+
+    def __init__(self, maxlen: int = 10) -> None:
+        """
+        Initialize the command queue.
+
+        Args:
+            maxlen: Maximum number of queued commands, the oldest is dropped when full
+        """
+        self.maxlen = maxlen
+        # Keyed by command name for coalesced commands, by a sequence number otherwise
+        self._commands: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def append(self, command_dict: Dict[str, Any]) -> None:
+        """
+        Add a command to the end of the queue, or update its queued value.
+
+        Args:
+            command_dict: Command dictionary with command, value, and source
+        """
+        with self._lock:
+            key = command_dict["command"]
+            if key not in COALESCED_COMMANDS:
+                key = self._next_seq
+                self._next_seq += 1
+            self._commands[key] = command_dict
+            if len(self._commands) > self.maxlen:
+                self._commands.popitem(last=False)
+
+    def popleft(self) -> Dict[str, Any]:
+        """
+        Remove and return the oldest command.
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        with self._lock:
+            if not self._commands:
+                raise IndexError("pop from an empty command queue")
+            return self._commands.popitem(last=False)[1]
+
+    def pop(self) -> Dict[str, Any]:
+        """
+        Remove and return the newest command.
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        with self._lock:
+            if not self._commands:
+                raise IndexError("pop from an empty command queue")
+            return self._commands.popitem(last=True)[1]
+
+    def clear(self) -> None:
+        """Remove all queued commands."""
+        with self._lock:
+            self._commands.clear()
+
 
 # Queue for storing commands received from WebSocket clients
-command_queue: Deque[Dict[str, Any]] = deque(maxlen=10)
+command_queue = CommandQueue(maxlen=10)
+
+
+def validate_command(command: Any, value: Any, source: Any) -> None:
+    """
+    Validate the fields of a control command.
+
+    Args:
+        command: Command name
+        value: Command value
+        source: Command source
+
+    Raises:
+        ValueError: If any of the fields is invalid
+    """
+    if not isinstance(command, str):
+        raise ValueError("Invalid command: must be a string")
+
+    if not isinstance(value, (int, float)):
+        raise ValueError("Invalid value: must be a number")
+
+    if source not in VALID_COMMAND_SOURCES:
+        raise ValueError("Invalid source: must be 'gamepad' or 'keyboard'")
+
+    if command not in VALID_COMMANDS:
+        raise ValueError(
+            f"Invalid command: '{command}'. Must be one of {sorted(VALID_COMMANDS)}"
+        )
 
 
 @dataclass
@@ -27,104 +218,180 @@ class ControlCommand:
 
     def __post_init__(self):
         """Validate the command data after initialization"""
-        if not isinstance(self.command, str):
-            raise ValueError("Invalid command: must be a string")
-
-        if not isinstance(self.value, (int, float)):
-            raise ValueError("Invalid value: must be a number")
-
-        if self.source not in ["gamepad", "keyboard"]:
-            raise ValueError("Invalid source: must be 'gamepad' or 'keyboard'")
-
-        # Validate command is a valid control parameter
-        valid_commands = [
-            "power_cmd",
-            "roll_cmd",
-            "pitch_cmd",
-            "yaw_cmd",
-            "thrust_tilt_cmd",
-            "flap_cmd",
-            "speedbrake_cmd",
-            "landing_gear_cmd",
-            "wheel_steer_cmd",
-            "wheel_brake_cmd",
-            "airspeed_setpoint_kts",
-            "heading_setpoint_deg",
-            "altitude_setpoint_ft",
-            "manual_override",
-            "left_stick_x",
-            "left_stick_y",
-            "right_stick_x",
-            "right_stick_y",
-        ]
-        if self.command not in valid_commands:
-            raise ValueError(
-                f"Invalid command: '{self.command}'. Must be one of {valid_commands}"
-            )
+        validate_command(self.command, self.value, self.source)
+
+
+def parse_command_message(message: str) -> Dict[str, Any]:
+    """
+    Parse and validate a WebSocket command message.
+
+    Args:
+        message: JSON message string
+
+    Returns:
+        Command dictionary with command, value, and source
+
+    Raises:
+        ValueError: If the message isn't valid JSON or the command is invalid
+    """
+    data = orjson.loads(message)
+
+    # Validate the command
+    command = data.get("command", "")
+    value = data.get("value", 0)
+    source = data.get("source", "")
+    validate_command(command, value, source)
+
+    logger.debug("Received %s command: %s with value: %s", source, command, value)
+    return {"command": command, "value": value, "source": source}
+
+
+async def apply_command(
+    command_dict: Dict[str, Any],
+    websocket: WebSocketServerProtocol,
+    custom_handler: Optional[Callable] = None,
+) -> None:
+    """
+    Add a validated command to the queue and call the custom handler with it.
+
+    Args:
+        command_dict: Command dictionary with command, value, and source
+        websocket: WebSocket connection the command was received from
+        custom_handler: Optional custom handler for command messages
+    """
+    # Add command to queue
+    command_queue.append(command_dict)
+
+    # Call custom handler if provided
+    if custom_handler:
+        await custom_handler(command_dict, websocket)
+
+
+def command_response(command_dict: Dict[str, Any]) -> str:
+    """
+    Build the acknowledgment sent for a processed command.
+
+    Args:
+        command_dict: Command dictionary with command, value, and source
+
+    Returns:
+        JSON acknowledgment message
+    """
+    return orjson.dumps({"status": "received", **command_dict}).decode()
+
+
+def command_error_response(error: Exception) -> str:
+    """
+    Build the error response sent for a command message that couldn't be processed.
+
+    Args:
+        error: Exception raised while processing the message
+
+    Returns:
+        JSON error message
+    """
+    if isinstance(error, orjson.JSONDecodeError):
+        # Checked before ValueError since JSONDecodeError is a subclass of it
+        logger.warning("Invalid JSON received")
+        message = "Invalid JSON format"
+    elif isinstance(error, ValueError):
+        logger.warning("Validation error: %s", error)
+        message = str(error)
+    else:
+        logger.warning("Error processing message: %s", error)
+        message = "Server error"
+    return orjson.dumps({"status": "error", "message": message}).decode()
 
 
 async def handle_command_message(
     message: str,
     websocket: WebSocketServerProtocol,
     custom_handler: Optional[Callable] = None,
-) -> None:
+) -> Optional[Dict[str, Any]]:
     """
-    Process incoming WebSocket command messages and validate commands.
+    Process an incoming WebSocket command message and validate the command.
 
     Args:
         message: JSON message string
         websocket: WebSocket connection to respond to
         custom_handler: Optional custom handler for command messages
+
+    Returns:
+        The command dictionary, or None if the message is invalid
     """
     try:
-        data = json.loads(message)
+        command_dict = parse_command_message(message)
+        await apply_command(command_dict, websocket, custom_handler)
+        response = command_response(command_dict)
+    except websockets.exceptions.ConnectionClosed:
+        raise
+    except Exception as e:
+        command_dict = None
+        response = command_error_response(e)
 
-        # Create and validate the command
-        command_data = ControlCommand(
-            command=data.get("command", ""),
-            value=data.get("value", 0),
-            source=data.get("source", ""),
-        )
+    # Send acknowledgment
+    await websocket.send(response)
+    return command_dict
 
-        print(
-            f"Received {command_data.source} command: {command_data.command} with value: {command_data.value}"
-        )
 
-        # Add command to queue
-        command_dict = {
-            "command": command_data.command,
-            "value": command_data.value,
-            "source": command_data.source,
-        }
-        command_queue.append(command_dict)
-
-        # Call custom handler if provided
-        if custom_handler:
-            await custom_handler(command_dict, websocket)
-
-        # Send acknowledgment
-        await websocket.send(
-            json.dumps(
-                {
-                    "status": "received",
-                    "command": command_data.command,
-                    "value": command_data.value,
-                    "source": command_data.source,
-                }
-            )
-        )
+async def handle_command_batch(
+    messages: List[str],
+    websocket: WebSocketServerProtocol,
+    custom_handler: Optional[Callable] = None,
+) -> None:
+    """
+    Process a batch of WebSocket command messages received together.
 
-    except ValueError as ve:
-        print(f"Validation error: {ve}")
-        await websocket.send(json.dumps({"status": "error", "message": str(ve)}))
-    except json.JSONDecodeError:
-        print("Invalid JSON received")
-        await websocket.send(
-            json.dumps({"status": "error", "message": "Invalid JSON format"})
-        )
-    except Exception as e:
-        print(f"Error processing message: {e}")
-        await websocket.send(json.dumps({"status": "error", "message": "Server error"}))
+    Every message is validated, queued and acknowledged in the order it was
+    received. For commands in COALESCED_COMMANDS, the custom handler is only
+    called with the last value in the batch. If the connection closes, the rest
+    of the batch is still queued and handled before ConnectionClosed is raised.
+
+    Args:
+        messages: JSON message strings in the order they were received
+        websocket: WebSocket connection to respond to
+        custom_handler: Optional custom handler for command messages
+    """
+    parsed: List[Union[Dict[str, Any], Exception]] = []
+    for message in messages:
+        try:
+            parsed.append(parse_command_message(message))
+        except Exception as e:
+            parsed.append(e)
+
+    # Position of the last value of each coalesced command in the batch
+    last_positions = {
+        command_dict["command"]: index
+        for index, command_dict in enumerate(parsed)
+        if isinstance(command_dict, dict)
+        and command_dict["command"] in COALESCED_COMMANDS
+    }
+
+    closed: Optional[websockets.exceptions.ConnectionClosed] = None
+    for index, command_dict in enumerate(parsed):
+        if isinstance(command_dict, Exception):
+            response = command_error_response(command_dict)
+        else:
+            handler = custom_handler
+            if last_positions.get(command_dict["command"], index) != index:
+                handler = None
+            try:
+                await apply_command(command_dict, websocket, handler)
+                response = command_response(command_dict)
+            except websockets.exceptions.ConnectionClosed as e:
+                closed = e
+                continue
+            except Exception as e:
+                response = command_error_response(e)
+
+        if closed is None:
+            try:
+                await websocket.send(response)
+            except websockets.exceptions.ConnectionClosed as e:
+                closed = e
+
+    if closed is not None:
+        raise closed
 
 
 async def handle_command_client(
@@ -141,22 +408,36 @@ async def handle_command_client(
         custom_handler: Optional custom handler for command messages
     """
     clients.add(websocket)
-    print(f"Command client connected! ({len(clients)} clients)")
+    logger.info("Command client connected! (%d clients)", len(clients))
 
     try:
         async for message in websocket:
-            # Process messages asynchronously
-            asyncio.create_task(
-                handle_command_message(message, websocket, custom_handler)
-            )
+            # Drain the messages that were already received without waiting for
+            # more, so that a burst of messages is handled in one batch. recv()
+            # returns a buffered message without suspending, and is only canceled
+            # (which doesn't lose messages) if it would have to wait.
+            messages = [message]
+            closed = False
+            while len(messages) < COMMAND_BATCH_SIZE:
+                try:
+                    async with asyncio.timeout(0):
+                        messages.append(await websocket.recv())
+                except TimeoutError:
+                    break
+                except websockets.exceptions.ConnectionClosed:
+                    closed = True
+                    break
+
+            await handle_command_batch(messages, websocket, custom_handler)
+            if closed:
+                break
     except websockets.exceptions.ConnectionClosed:
-        print("Command client disconnected.")
+        logger.info("Command client disconnected.")
     except Exception as e:
-        print(f"Error while processing connection: {e}")
-        traceback.print_exc()
+        logger.exception("Error while processing connection: %s", e)
     finally:
         clients.remove(websocket)
-        print(f"Command client removed. ({len(clients)} clients remaining)")
+        logger.info("Command client removed. (%d clients remaining)", len(clients))
 
 
 async def start_command_server(
@@ -187,13 +468,15 @@ async def start_command_server(
         ping_interval=ping_interval,
         ping_timeout=ping_timeout,
         close_timeout=close_timeout,
+        # Payloads are small JSON messages, not worth compressing
+        compression=None,
     ):
         print(f"Command WebSocket server running on ws://localhost:{port}")
         # Keep the server running indefinitely
         await asyncio.Future()
 
 
-def get_command_queue() -> Deque[Dict[str, Any]]:
+def get_command_queue() -> CommandQueue:
     """
     Get the command queue.
 
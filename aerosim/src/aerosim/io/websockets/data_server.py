@@ -5,15 +5,45 @@ This module provides a WebSocket server for sending flight data to aerosim-app.
 """
 
 import asyncio
-import json
 import traceback
-from typing import Set, Dict, Any, Optional, Callable, Deque
-from collections import deque
+from operator import attrgetter
+from typing import Set, Dict, Any, Optional, Callable
 from websockets import WebSocketServerProtocol
 import websockets
+import orjson
 
-# Queue for storing flight data to be sent to WebSocket clients
-data_queue: Deque[Dict[str, Any]] = deque(maxlen=1)
+# Latest flight data to be sent to WebSocket clients, encoded once as JSON and
+# shared by all clients, and the event that wakes the clients when it is
+# updated (created on the data server's event loop)
+latest_flight_data: Optional[str] = None
+data_event: Optional[asyncio.Event] = None
+data_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Incremented on every flight data update so each client knows whether it has
+# sent the latest one
+flight_data_version = 0
+
+# Numeric fields of FlightDisplayData sent to aerosim-app, read all at once with
+# a single attrgetter call
+FLIGHT_DISPLAY_FIELDS = (
+    "airspeed_kts",
+    "true_airspeed_kts",
+    "altitude_ft",
+    "target_altitude_ft",
+    "altimeter_pressure_setting_inhg",
+    "vertical_speed_fpm",
+    "pitch_deg",
+    "roll_deg",
+    "side_slip_fps2",
+    "heading_deg",
+    "hsi_course_select_heading_deg",
+    "hsi_course_deviation_deg",
+)
+get_flight_display_values = attrgetter(*FLIGHT_DISPLAY_FIELDS)
+
+# Minimum time between messages to a client in seconds, updates arriving in
+# between are coalesced into the next message
+DATA_SEND_INTERVAL = 0.01
 
 async def handle_data_client(
     websocket: WebSocketServerProtocol,
@@ -31,21 +61,25 @@ async def handle_data_client(
     clients.add(websocket)
     print(f"Flight data client connected! ({len(clients)} clients)")
     
+    sent_version = 0
+    
     try:
         while True:
             if custom_handler:
                 # Use custom handler if provided
                 await custom_handler(websocket)
             else:
-                # Default flight data behavior
-                if data_queue:
-                    data = data_queue.pop()
-                    
-                    # Send flight data to client
-                    await websocket.send(json.dumps(data))
+                # Default flight data behavior, wait until new flight data arrives
+                while sent_version == flight_data_version:
+                    await data_event.wait()
+                    data_event.clear()
+                sent_version = flight_data_version
+                
+                # Send flight data to client
+                await websocket.send(latest_flight_data)
                 
-                # Short sleep to prevent CPU overuse
-                await asyncio.sleep(0.1)
+                # Limit the message rate, only the latest update is sent after this
+                await asyncio.sleep(DATA_SEND_INTERVAL)
                 
     except websockets.exceptions.ConnectionClosed:
         print("Flight data client disconnected.")
@@ -73,7 +107,11 @@ async def start_data_server(
         ping_timeout: Timeout for ping responses in seconds
         close_timeout: Timeout for close handshake in seconds
     """
+    global data_event, data_loop
+    
     clients: Set[WebSocketServerProtocol] = set()
+    data_event = asyncio.Event()
+    data_loop = asyncio.get_running_loop()
     
     print(f"Starting flight data WebSocket server on port {port}...")
     
@@ -83,7 +121,9 @@ async def start_data_server(
         port,
         ping_interval=ping_interval,
         ping_timeout=ping_timeout,
-        close_timeout=close_timeout
+        close_timeout=close_timeout,
+        # Payloads are small JSON messages, not worth compressing
+        compression=None
     ):
         print(f"Flight data WebSocket server running on ws://localhost:{port}")
         # Keep the server running indefinitely
@@ -93,10 +133,49 @@ def add_flight_data_to_queue(data: Dict[str, Any]) -> None:
     """
     Add flight data to the queue for sending to WebSocket clients.
     
+    This function is thread-safe and can be called from middleware callbacks.
+    
     Args:
         data: Flight data dictionary
     """
-    data_queue.append(data)
+    encoded_data = orjson.dumps(data).decode()
+    if data_loop is not None:
+        data_loop.call_soon_threadsafe(set_latest_flight_data, encoded_data)
+    else:
+        set_latest_flight_data(encoded_data)
+
+def set_latest_flight_data(encoded_data: str) -> None:
+    """
+    Replace the latest flight data and wake the clients waiting for it.
+    
+    Must be called from the data server's event loop once it has started.
+    
+    Args:
+        encoded_data: Flight data encoded as JSON
+    """
+    global latest_flight_data, flight_data_version
+    
+    latest_flight_data = encoded_data
+    flight_data_version += 1
+    if data_event is not None:
+        data_event.set()
+
+def flight_display_to_dict(data: Any) -> Dict[str, Any]:
+    """
+    Convert flight display data to the format expected by aerosim-app.
+    
+    Args:
+        data: Flight display data from middleware
+        
+    Returns:
+        Flight data dictionary
+    """
+    flight_data = dict(zip(FLIGHT_DISPLAY_FIELDS, get_flight_display_values(data)))
+    
+    # Convert HSIMode to string to avoid JSON serialization issues
+    hsi_mode = data.hsi_mode
+    flight_data["hsi_mode"] = hsi_mode.name if hasattr(hsi_mode, "name") else str(hsi_mode)
+    return flight_data
 
 def on_flight_display_data(data: Dict[str, Any], _: Any) -> None:
     """
@@ -110,26 +189,7 @@ def on_flight_display_data(data: Dict[str, Any], _: Any) -> None:
     """
     try:
         # Convert flight display data to the format expected by aerosim-app
-        # Convert HSIMode to string to avoid JSON serialization issues
-        hsi_mode_value = str(data.hsi_mode)
-        if hasattr(data.hsi_mode, 'name'):
-            hsi_mode_value = data.hsi_mode.name
-        
-        flight_data = {
-            "airspeed_kts": data.airspeed_kts,
-            "true_airspeed_kts": data.true_airspeed_kts,
-            "altitude_ft": data.altitude_ft,
-            "target_altitude_ft": data.target_altitude_ft,
-            "altimeter_pressure_setting_inhg": data.altimeter_pressure_setting_inhg,
-            "vertical_speed_fpm": data.vertical_speed_fpm,
-            "pitch_deg": data.pitch_deg,
-            "roll_deg": data.roll_deg,
-            "side_slip_fps2": data.side_slip_fps2,
-            "heading_deg": data.heading_deg,
-            "hsi_course_select_heading_deg": data.hsi_course_select_heading_deg,
-            "hsi_course_deviation_deg": data.hsi_course_deviation_deg,
-            "hsi_mode": hsi_mode_value
-        }
+        flight_data = flight_display_to_dict(data)
         
         # Add the flight data to the queue for streaming
         add_flight_data_to_queue(flight_data)
@@ -7,10 +7,10 @@ This module provides a WebSocket server for streaming camera images to aerosim-a
 import asyncio
 import traceback
 import base64
+import concurrent.futures
 import numpy as np
 import cv2
-from typing import Set, Optional, Callable, Deque
-from collections import deque
+from typing import Set, Dict, Optional, Callable, Tuple, Union
 from websockets import WebSocketServerProtocol
 import websockets
 
@@ -20,8 +20,118 @@ from aerosim_data import middleware
 # Initialize bincode serializer
 serializer = middleware.BincodeSerializer()
 
-# Queue for storing images to be sent to WebSocket clients
-image_queue: Deque[np.ndarray] = deque(maxlen=5)
+# Subprotocol for clients that accept JPEG images as binary frames, other
+# clients receive base64 encoded JPEG images as text frames
+IMAGE_BINARY_SUBPROTOCOL = "aerosim.jpeg"
+
+# Maximum image dimension streamed to aerosim-app, larger images are downscaled
+MAX_IMAGE_DIM = 800
+
+# Downscaled (width, height) for each input (height, width), camera
+# resolutions rarely change so this only holds a few entries
+resize_targets: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+# Queue for storing images to be sent to WebSocket clients, created on the
+# image server's event loop when the server starts. Items are either decoded
+# images or compressed image bytes, which are only decoded if they need to be
+# downscaled or converted to JPEG when sent. Only the latest image is kept so
+# clients never receive stale frames.
+IMAGE_QUEUE_SIZE = 1
+image_queue: Optional["asyncio.Queue[Union[np.ndarray, bytes]]"] = None
+image_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Worker threads for JPEG encoding so it doesn't block the event loop
+# (cv2 and base64 both release the GIL while encoding)
+encode_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="aerosim.image_encode"
+)
+
+def encode_jpeg(image: np.ndarray) -> bytes:
+    """
+    Encode an image to JPEG.
+    
+    Args:
+        image: Image as a NumPy array
+        
+    Returns:
+        JPEG encoded image
+    """
+    _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return buffer.tobytes()
+
+def read_jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read the dimensions of a JPEG image from its frame header without decoding it.
+    
+    Args:
+        data: JPEG encoded image
+        
+    Returns:
+        Tuple of (height, width), or None if the data isn't a valid JPEG image
+    """
+    if data[:3] != b"\xff\xd8\xff":
+        return None
+    
+    # Walk the marker segments until the start of frame (SOFn) segment
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            # Standalone markers without a length
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return height, width
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+def downscale_image(data: bytes) -> Optional[bytes]:
+    """
+    Decode a compressed image and re-encode it as a JPEG within MAX_IMAGE_DIM.
+    
+    Args:
+        data: Compressed image
+        
+    Returns:
+        JPEG encoded image, or None if the image couldn't be decoded
+    """
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None or img.size == 0:
+        return None
+    
+    h, w = img.shape[:2]
+    if h > MAX_IMAGE_DIM or w > MAX_IMAGE_DIM:
+        img = cv2.resize(img, get_resize_target(h, w), interpolation=cv2.INTER_AREA)
+    return encode_jpeg(img)
+
+def get_resize_target(h: int, w: int) -> Tuple[int, int]:
+    """
+    Get the size to downscale an image to so that it fits within MAX_IMAGE_DIM.
+    
+    Args:
+        h: Image height
+        w: Image width
+        
+    Returns:
+        Target (width, height) as expected by cv2.resize
+    """
+    target = resize_targets.get((h, w))
+    if target is None:
+        scale = MAX_IMAGE_DIM / max(h, w)
+        target = (int(w * scale), int(h * scale))
+        resize_targets[(h, w)] = target
+    return target
 
 async def handle_image_client(
     websocket: WebSocketServerProtocol,
@@ -39,26 +149,36 @@ async def handle_image_client(
     clients.add(websocket)
     print(f"Image client connected! ({len(clients)} clients)")
     
+    send_binary = websocket.subprotocol == IMAGE_BINARY_SUBPROTOCOL
+    
     try:
         while True:
             if custom_handler:
                 # Use custom handler if provided
                 await custom_handler(websocket)
             else:
-                # Default image streaming behavior
-                if image_queue:
-                    # Get the latest image from the queue
-                    image = image_queue.pop()
-                    
-                    # Encode image to JPEG and then to base64
-                    _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    encoded_image = base64.b64encode(buffer).decode("utf-8")
-                    
-                    # Send encoded image to client
-                    await websocket.send(encoded_image)
+                # Default image streaming behavior, wait until a new image arrives
+                image = await image_queue.get()
                 
-                # Short sleep to prevent CPU overuse
-                await asyncio.sleep(0.05)
+                # Encode image to JPEG in a worker thread, unless it is a JPEG
+                # image that can be streamed as-is
+                loop = asyncio.get_running_loop()
+                if not isinstance(image, bytes):
+                    image = await loop.run_in_executor(encode_pool, encode_jpeg, image)
+                else:
+                    jpeg_size = read_jpeg_size(image)
+                    if jpeg_size is None or max(jpeg_size) > MAX_IMAGE_DIM:
+                        image = await loop.run_in_executor(
+                            encode_pool, downscale_image, image
+                        )
+                        if image is None:
+                            continue
+                
+                # Send encoded image to client
+                if send_binary:
+                    await websocket.send(image)
+                else:
+                    await websocket.send(base64.b64encode(image).decode("ascii"))
                 
     except websockets.exceptions.ConnectionClosed:
         print("Image client disconnected.")
@@ -86,7 +206,11 @@ async def start_image_server(
         ping_timeout: Timeout for ping responses in seconds
         close_timeout: Timeout for close handshake in seconds
     """
+    global image_queue, image_loop
+    
     clients: Set[WebSocketServerProtocol] = set()
+    image_queue = asyncio.Queue(maxsize=IMAGE_QUEUE_SIZE)
+    image_loop = asyncio.get_running_loop()
     
     print(f"Starting image WebSocket server on port {port}...")
     
@@ -94,26 +218,47 @@ async def start_image_server(
         lambda ws: handle_image_client(ws, clients, custom_handler),
         "localhost",
         port,
+        subprotocols=[IMAGE_BINARY_SUBPROTOCOL],
         ping_interval=ping_interval,
         ping_timeout=ping_timeout,
-        close_timeout=close_timeout
+        close_timeout=close_timeout,
+        # JPEG images are already compressed
+        compression=None,
+        # Buffer up to a few frames before applying backpressure
+        write_limit=2**20
     ):
         print(f"Image WebSocket server running on ws://localhost:{port}")
         # Keep the server running indefinitely
         await asyncio.Future()
 
-def add_image_to_queue(image: np.ndarray) -> None:
+def put_latest_image(image: Union[np.ndarray, bytes]) -> None:
+    """
+    Put an image into the queue, dropping the oldest one if the queue is full.
+    
+    Must be called from the image server's event loop.
+    
+    Args:
+        image: Image as a NumPy array or JPEG bytes
+    """
+    if image_queue.full():
+        image_queue.get_nowait()
+    image_queue.put_nowait(image)
+
+def add_image_to_queue(image: Union[np.ndarray, bytes]) -> None:
     """
     Add an image to the queue for streaming to WebSocket clients.
     
+    This function is thread-safe and can be called from middleware callbacks.
+    Images are dropped if the image server hasn't been started.
+    
     Args:
-        image: Image as a NumPy array
+        image: Image as a NumPy array or JPEG bytes
     """
-    # Check if image is None
-    if image is None:
+    # Check if image is None or there is no server to stream to
+    if image is None or image_loop is None:
         return
         
-    image_queue.append(image)
+    image_loop.call_soon_threadsafe(put_latest_image, image)
 
 def on_camera_data(payload: bytes) -> None:
     """
@@ -124,27 +269,17 @@ def on_camera_data(payload: bytes) -> None:
     Args:
         payload: Raw camera data from middleware
     """
+    if image_queue is None:
+        return
+    
     try:
         # Deserialize the message using the proper type
         _, data = serializer.deserialize_message(aerosim_types.CompressedImage, payload)
         
-        # Convert bytes to NumPy array
-        image_array = np.frombuffer(data.data, dtype=np.uint8)
-        
-        # Decode the image
-        img = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+        # Queue the compressed image, replacing any unsent one. It is only
+        # decoded and downscaled if needed once it is actually sent.
+        add_image_to_queue(data.data)
         
-        if img is not None and img.size > 0:
-            # Process image for display (resize if needed)
-            max_dim = 800
-            h, w = img.shape[:2]
-            if h > max_dim or w > max_dim:
-                scale = max_dim / max(h, w)
-                img = cv2.resize(img, (int(w * scale), int(h * scale)))
-            
-            # Add the image to the queue for streaming
-            add_image_to_queue(img)
-            
     except Exception as e:
         print(f"Error processing camera data: {e}")
         traceback.print_exc()
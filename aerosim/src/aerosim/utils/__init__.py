@@ -4,6 +4,16 @@ Utilities module for AeroSim.
 This module provides common utility functions for the AeroSim package.
 """
 
-from .helpers import clamp, normalize_heading_deg, distance_m_bearing_deg
+from .helpers import (
+    clamp,
+    normalize_heading_deg,
+    distance_m_bearing_deg,
+    distance_m_bearing_deg_vec,
+)
 
-__all__ = ["clamp", "normalize_heading_deg", "distance_m_bearing_deg"]
+__all__ = [
+    "clamp",
+    "normalize_heading_deg",
+    "distance_m_bearing_deg",
+    "distance_m_bearing_deg_vec",
+]
@@ -7,6 +7,13 @@ This module provides common utility functions used throughout the AeroSim packag
 import math
 from typing import Tuple
 
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Conversion factors between degrees and radians
+DEG_TO_RAD = math.pi / 180.0
+RAD_TO_DEG = 180.0 / math.pi
+
 
 def clamp(n: float, minn: float, maxn: float) -> float:
     """
@@ -20,7 +27,9 @@ def clamp(n: float, minn: float, maxn: float) -> float:
     Returns:
         Clamped value
     """
-    return max(min(maxn, n), minn)
+    # Same comparisons as max(min(maxn, n), minn), without the builtin calls
+    n = n if n < maxn else maxn
+    return minn if minn > n else n
 
 
 def normalize_heading_deg(heading: float) -> float:
@@ -33,16 +42,17 @@ def normalize_heading_deg(heading: float) -> float:
     Returns:
         Normalized heading in degrees
     """
-    while heading < 0.0:
-        heading += 360.0
-    while heading >= 360.0:
-        heading -= 360.0
-    return heading
+    heading %= 360.0
+    # Tiny negative headings round up to exactly 360.0 in the modulo
+    return 0.0 if heading == 360.0 else heading
 
 
 def distance_m_bearing_deg(lat1_deg: float, lon1_deg: float, lat2_deg: float, lon2_deg: float) -> Tuple[float, float]:
     """
-    Calculate spherical arc distance and bearing between two LLAs (Haversine).
+    Calculate spherical arc distance and bearing between two LLAs.
+
+    Uses the spherical form of Vincenty's formula, which stays accurate for
+    both nearby and antipodal points, and shares its terms with the bearing.
 
     Args:
         lat1_deg: Origin Latitude in degrees
@@ -54,31 +64,88 @@ def distance_m_bearing_deg(lat1_deg: float, lon1_deg: float, lat2_deg: float, lo
         Tuple of (distance in meters, bearing in degrees)
     """
     # Convert degree to radian
-    lat1 = lat1_deg * math.pi / 180.0
-    lon1 = lon1_deg * math.pi / 180.0
-    lat2 = lat2_deg * math.pi / 180.0
-    lon2 = lon2_deg * math.pi / 180.0
+    lat1 = lat1_deg * DEG_TO_RAD
+    lon1 = lon1_deg * DEG_TO_RAD
+    lat2 = lat2_deg * DEG_TO_RAD
+    lon2 = lon2_deg * DEG_TO_RAD
 
-    # Calculate difference between latitudes and longitudes
-    dLat = lat2 - lat1
+    # Calculate difference between longitudes
     dLon = lon2 - lon1
 
-    # Haversine formula
-    a = math.sin(dLat / 2) * math.sin(dLat / 2) + math.cos(lat1) * math.cos(
-        lat2
-    ) * math.sin(dLon / 2) * math.sin(dLon / 2)
-    c = 2 * math.asin(math.sqrt(a))
+    sinLat1 = math.sin(lat1)
+    cosLat1 = math.cos(lat1)
+    sinLat2 = math.sin(lat2)
+    cosLat2 = math.cos(lat2)
+    sinDLon = math.sin(dLon)
+    cosDLon = math.cos(dLon)
+
+    # East and north components of the direction to the destination
+    east = cosLat2 * sinDLon
+    north = cosLat1 * sinLat2 - sinLat1 * cosLat2 * cosDLon
+
+    # Vincenty formula
+    c = math.atan2(
+        math.hypot(east, north), sinLat1 * sinLat2 + cosLat1 * cosLat2 * cosDLon
+    )
     R = 6372800.0  # For Earth radius in meters
 
     # Calculate bearing
-    bearing = math.atan2(
-        math.sin(dLon) * math.cos(lat2),
-        math.cos(lat1) * math.sin(lat2)
-        - math.sin(lat1) * math.cos(lat2) * math.cos(dLon),
-    )
-    bearing *= 180.0 / math.pi
+    bearing = math.atan2(east, north) * RAD_TO_DEG
     if bearing < 0:
         bearing += 360.0
 
     # Return distance in meters and bearing in degrees
     return R * c, bearing
+
+
+def distance_m_bearing_deg_vec(
+    lat1_deg: ArrayLike, lon1_deg: ArrayLike, lat2_deg: ArrayLike, lon2_deg: ArrayLike
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate spherical arc distances and bearings between arrays of LLAs.
+
+    Vectorized version of distance_m_bearing_deg for many LLA pairs at once, the
+    arguments are broadcast against each other. For a single pair the scalar
+    version is faster.
+
+    Args:
+        lat1_deg: Origin Latitudes in degrees
+        lon1_deg: Origin Longitudes in degrees
+        lat2_deg: Destination Latitudes in degrees
+        lon2_deg: Destination Longitudes in degrees
+
+    Returns:
+        Tuple of (distances in meters, bearings in degrees) arrays
+    """
+    # Convert degree to radian
+    lat1 = np.deg2rad(lat1_deg)
+    lon1 = np.deg2rad(lon1_deg)
+    lat2 = np.deg2rad(lat2_deg)
+    lon2 = np.deg2rad(lon2_deg)
+
+    # Calculate difference between longitudes
+    dLon = lon2 - lon1
+
+    sinLat1 = np.sin(lat1)
+    cosLat1 = np.cos(lat1)
+    sinLat2 = np.sin(lat2)
+    cosLat2 = np.cos(lat2)
+    sinDLon = np.sin(dLon)
+    cosDLon = np.cos(dLon)
+
+    # East and north components of the direction to the destination
+    east = cosLat2 * sinDLon
+    north = cosLat1 * sinLat2 - sinLat1 * cosLat2 * cosDLon
+
+    # Vincenty formula
+    c = np.arctan2(
+        np.hypot(east, north), sinLat1 * sinLat2 + cosLat1 * cosLat2 * cosDLon
+    )
+    R = 6372800.0  # For Earth radius in meters
+
+    # Calculate bearing
+    bearing = np.rad2deg(np.arctan2(east, north))
+    bearing = np.where(bearing < 0.0, bearing + 360.0, bearing)
+
+    # Return distances in meters and bearings in degrees
+    return R * c, bearing
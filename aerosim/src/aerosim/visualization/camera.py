@@ -7,6 +7,7 @@ This module provides utilities for handling camera data from the simulation.
 import cv2
 import numpy as np
 import base64
+import simplejpeg
 from typing import Optional, Callable, Dict, Any
 
 from ..io.websockets.image_server import add_image_to_queue
@@ -27,31 +28,54 @@ class CameraManager:
             image_callback: Callback function to be called when a new image is received
         """
         self.image_callback = image_callback
-        self.latest_image = None
+        # Latest image as [JPEG bytes, decoded image], replaced as a whole on each
+        # new image so readers always see a matching pair. JPEG images are only
+        # decoded when the decoded image is needed.
+        self._latest = [None, None]
+    
+    @property
+    def latest_image(self) -> Optional[np.ndarray]:
+        """The latest camera image, decoded on first access."""
+        latest = self._latest
+        if latest[1] is None and latest[0] is not None:
+            latest[1] = simplejpeg.decode_jpeg(latest[0], colorspace="BGR")
+        return latest[1]
+    
+    @latest_image.setter
+    def latest_image(self, image: Optional[np.ndarray]) -> None:
+        self._latest = [None, image]
     
     def process_camera_data(self, payload: bytes) -> None:
         """
         Process camera data from middleware.
         
         Args:
-            payload: Raw camera data from middleware
+            payload: Raw camera data from middleware, either image bytes such as
+                CompressedImage.data or an image encoded in base64 (bytes or str)
         """
         try:
-            # Decode the image from the payload
-            # This assumes the payload is a JPEG image encoded in base64
-            jpg_as_text = base64.b64decode(payload)
-            jpg_as_np = np.frombuffer(jpg_as_text, dtype=np.uint8)
-            image = cv2.imdecode(jpg_as_np, flags=1)
-            
-            # Store the latest image
-            self.latest_image = image
-            
-            # Add the image to the WebSocket queue for streaming
-            add_image_to_queue(image)
+            # Decode the image from the payload, base64 is only decoded when needed
+            # since base64 text can't start with the JPEG start of image marker.
+            # is_jpeg() only accepts bytes-like payloads, str is always base64.
+            is_binary = isinstance(payload, (bytes, bytearray, memoryview))
+            if is_binary and simplejpeg.is_jpeg(payload):
+                jpg_as_text = payload
+            else:
+                jpg_as_text = base64.b64decode(payload)
+            if simplejpeg.is_jpeg(jpg_as_text):
+                # Keep the JPEG as-is, it's streamed without re-encoding and only
+                # decoded if the image itself is needed
+                self._latest = [jpg_as_text, None]
+                add_image_to_queue(jpg_as_text)
+            else:
+                # Decode other image formats with OpenCV
+                jpg_as_np = np.frombuffer(jpg_as_text, dtype=np.uint8)
+                self.latest_image = cv2.imdecode(jpg_as_np, flags=1)
+                add_image_to_queue(self.latest_image)
             
             # Call the image callback if provided
             if self.image_callback:
-                self.image_callback(image)
+                self.image_callback(self.latest_image)
                 
         except Exception as e:
             print(f"Error processing camera data: {e}")
@@ -75,12 +99,18 @@ class CameraManager:
         Returns:
             True if the image was saved successfully, False otherwise
         """
-        if self.latest_image is None:
+        jpeg_bytes, image = self._latest
+        if jpeg_bytes is None and image is None:
             print("No image to save")
             return False
         
         try:
-            cv2.imwrite(filename, self.latest_image)
+            if jpeg_bytes is not None and filename.lower().endswith((".jpg", ".jpeg")):
+                # Write the received JPEG as-is instead of decoding and re-encoding it
+                with open(filename, "wb") as f:
+                    f.write(jpeg_bytes)
+            else:
+                cv2.imwrite(filename, self.latest_image)
             print(f"Image saved to {filename}")
             return True
         except Exception as e:
@@ -88,20 +118,19 @@ class CameraManager:
             return False
 
 
+# Camera manager used by the on_camera_data callback
+_camera_manager = CameraManager()
+
+
 def on_camera_data(payload: bytes) -> None:
     """
     Callback function for processing camera data from middleware.
     
     This function is designed to be used as a callback for aerosim_data middleware.
-    It creates a CameraManager instance if one doesn't exist and processes the camera data.
+    It processes the camera data with a module-level CameraManager instance.
     
     Args:
         payload: Raw camera data from middleware
     """
-    # Create a global camera manager if one doesn't exist
-    global _camera_manager
-    if '_camera_manager' not in globals():
-        _camera_manager = CameraManager()
-    
     # Process the camera data
     _camera_manager.process_camera_data(payload)
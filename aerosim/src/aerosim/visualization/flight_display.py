@@ -6,7 +6,7 @@ This module provides utilities for handling flight display data from the simulat
 
 from typing import Optional, Callable, Dict, Any
 
-from ..io.websockets.data_server import add_flight_data_to_queue
+from ..io.websockets.data_server import add_flight_data_to_queue, flight_display_to_dict
 
 
 class FlightDisplayManager:
@@ -36,21 +36,7 @@ class FlightDisplayManager:
         """
         try:
             # Convert flight display data to the format expected by aerosim-app
-            flight_data = {
-                "airspeed_kts": data.airspeed_kts,
-                "true_airspeed_kts": data.true_airspeed_kts,
-                "altitude_ft": data.altitude_ft,
-                "target_altitude_ft": data.target_altitude_ft,
-                "altimeter_pressure_setting_inhg": data.altimeter_pressure_setting_inhg,
-                "vertical_speed_fps": data.vertical_speed_fps,
-                "pitch_deg": data.pitch_deg,
-                "roll_deg": data.roll_deg,
-                "side_slip_fps2": data.side_slip_fps2,
-                "heading_deg": data.heading_deg,
-                "hsi_course_select_heading_deg": data.hsi_course_select_heading_deg,
-                "hsi_course_deviation_deg": data.hsi_course_deviation_deg,
-                "hsi_mode": data.hsi_mode
-            }
+            flight_data = flight_display_to_dict(data)
             
             # Store the latest flight data
             self.latest_data = flight_data
@@ -75,21 +61,20 @@ class FlightDisplayManager:
         return self.latest_data
 
 
+# Flight display manager used by the on_flight_display_data callback
+_flight_display_manager = FlightDisplayManager()
+
+
 def on_flight_display_data(data: Dict[str, Any], _: Any = None) -> None:
     """
     Callback function for processing flight display data from middleware.
     
     This function is designed to be used as a callback for aerosim_data middleware.
-    It creates a FlightDisplayManager instance if one doesn't exist and processes the flight display data.
+    It processes the flight display data with a module-level FlightDisplayManager instance.
     
     Args:
         data: Flight display data from middleware
         _: Unused parameter
     """
-    # Create a global flight display manager if one doesn't exist
-    global _flight_display_manager
-    if '_flight_display_manager' not in globals():
-        _flight_display_manager = FlightDisplayManager()
-    
     # Process the flight display data
     _flight_display_manager.process_flight_display_data(data, _)
@@ -0,0 +1,149 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from aerosim.utils.helpers import (
+    clamp,
+    normalize_heading_deg,
+    distance_m_bearing_deg,
+    distance_m_bearing_deg_vec,
+)
+
+EARTH_RADIUS_M = 6372800.0
+
+
+def haversine_distance_m_bearing_deg(lat1_deg, lon1_deg, lat2_deg, lon2_deg):
+    # Reference implementation with the original Haversine formula
+    lat1 = math.radians(lat1_deg)
+    lon1 = math.radians(lon1_deg)
+    lat2 = math.radians(lat2_deg)
+    lon2 = math.radians(lon2_deg)
+    dLat = lat2 - lat1
+    dLon = lon2 - lon1
+    a = (
+        math.sin(dLat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(dLon / 2) ** 2
+    )
+    c = 2 * math.asin(math.sqrt(a))
+    bearing = math.degrees(
+        math.atan2(
+            math.sin(dLon) * math.cos(lat2),
+            math.cos(lat1) * math.sin(lat2)
+            - math.sin(lat1) * math.cos(lat2) * math.cos(dLon),
+        )
+    )
+    if bearing < 0:
+        bearing += 360.0
+    return EARTH_RADIUS_M * c, bearing
+
+
+def random_lla_pairs(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (
+            rng.uniform(-89.0, 89.0),
+            rng.uniform(-180.0, 180.0),
+            rng.uniform(-89.0, 89.0),
+            rng.uniform(-180.0, 180.0),
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "n, minn, maxn",
+    [
+        (-1.5, 0.0, 1.0),
+        (0.5, 0.0, 1.0),
+        (2.0, 0.0, 1.0),
+        (0.0, 0.0, 1.0),
+        (1.0, 0.0, 1.0),
+        (-3, -2, 2),
+    ],
+)
+def test_clamp(n, minn, maxn):
+    assert clamp(n, minn, maxn) == max(min(maxn, n), minn)
+
+
+@pytest.mark.parametrize(
+    "heading, expected",
+    [
+        (0.0, 0.0),
+        (90.0, 90.0),
+        (360.0, 0.0),
+        (725.0, 5.0),
+        (-90.0, 270.0),
+        (-720.0, 0.0),
+        (-1e-15, 0.0),
+    ],
+)
+def test_normalize_heading_deg(heading, expected):
+    normalized = normalize_heading_deg(heading)
+    assert normalized == pytest.approx(expected)
+    assert 0.0 <= normalized < 360.0
+
+
+def test_normalize_heading_deg_nan():
+    assert math.isnan(normalize_heading_deg(float("nan")))
+
+
+def test_distance_m_bearing_deg_matches_haversine():
+    for lla_pair in random_lla_pairs(1000):
+        distance, bearing = distance_m_bearing_deg(*lla_pair)
+        expected_distance, expected_bearing = haversine_distance_m_bearing_deg(
+            *lla_pair
+        )
+        assert distance == pytest.approx(expected_distance, rel=1e-9, abs=1e-6)
+        assert bearing == pytest.approx(expected_bearing, abs=1e-9)
+
+
+def test_distance_m_bearing_deg_nearby_points():
+    lla_pair = (37.6213, -122.3790, 37.6214, -122.3789)
+    distance, bearing = distance_m_bearing_deg(*lla_pair)
+    expected_distance, expected_bearing = haversine_distance_m_bearing_deg(*lla_pair)
+    assert distance == pytest.approx(expected_distance, rel=1e-6)
+    assert bearing == pytest.approx(expected_bearing, abs=1e-6)
+
+
+def test_distance_m_bearing_deg_equal_points():
+    distance, bearing = distance_m_bearing_deg(37.6213, -122.3790, 37.6213, -122.3790)
+    assert distance == 0.0
+    assert bearing == 0.0
+
+
+@pytest.mark.parametrize(
+    "lat_deg, lon_deg", [(0.0, 0.0), (45.0, 90.0), (-30.0, -120.0)]
+)
+def test_distance_m_bearing_deg_antipodal_points(lat_deg, lon_deg):
+    distance, _ = distance_m_bearing_deg(lat_deg, lon_deg, -lat_deg, lon_deg + 180.0)
+    assert distance == pytest.approx(math.pi * EARTH_RADIUS_M, rel=1e-9)
+
+
+def test_distance_m_bearing_deg_vec_matches_scalar():
+    lla_pairs = random_lla_pairs(100, seed=1)
+    lla_pairs.append((37.6213, -122.3790, 37.6213, -122.3790))
+    lla_pairs.append((45.0, 90.0, -45.0, -90.0))
+    distances, bearings = distance_m_bearing_deg_vec(*np.array(lla_pairs).T)
+    assert distances.shape == bearings.shape == (len(lla_pairs),)
+    for lla_pair, distance, bearing in zip(lla_pairs, distances, bearings):
+        expected_distance, expected_bearing = distance_m_bearing_deg(*lla_pair)
+        assert distance == pytest.approx(expected_distance, rel=1e-12, abs=1e-6)
+        assert bearing == pytest.approx(expected_bearing, abs=1e-9)
+        assert 0.0 <= bearing < 360.0
+
+
+def test_distance_m_bearing_deg_vec_broadcasts_origin():
+    destinations = np.array(random_lla_pairs(10, seed=2))[:, 2:]
+    distances, bearings = distance_m_bearing_deg_vec(
+        37.6213, -122.3790, destinations[:, 0], destinations[:, 1]
+    )
+    for (lat2_deg, lon2_deg), distance, bearing in zip(
+        destinations, distances, bearings
+    ):
+        expected_distance, expected_bearing = distance_m_bearing_deg(
+            37.6213, -122.3790, lat2_deg, lon2_deg
+        )
+        assert distance == pytest.approx(expected_distance, rel=1e-12)
+        assert bearing == pytest.approx(expected_bearing, abs=1e-9)
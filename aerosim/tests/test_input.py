@@ -0,0 +1,67 @@
+import pygame
+import pytest
+
+from aerosim.io.input import KeyboardHandler
+
+
+class PressedKeys:
+    def __init__(self, *keys):
+        self.keys = set(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+@pytest.fixture
+def keyboard(monkeypatch):
+    monkeypatch.setattr(pygame.event, "pump", lambda: None)
+    monkeypatch.setattr(pygame.event, "peek", lambda event_type: False)
+    monkeypatch.setattr(pygame.event, "clear", lambda: None)
+    commands = []
+    handler = KeyboardHandler()
+    monkeypatch.setattr(
+        handler,
+        "process_command",
+        lambda command, value, source: commands.append((command, value, source)),
+    )
+    return handler, commands
+
+
+def press(monkeypatch, *keys):
+    monkeypatch.setattr(pygame.key, "get_pressed", lambda: PressedKeys(*keys))
+
+
+def test_keyboard_sends_command_on_key_press(keyboard, monkeypatch):
+    handler, commands = keyboard
+    press(monkeypatch, pygame.K_UP)
+    assert handler.update()
+    assert commands == [("airspeed_setpoint_kts", 5.0, "keyboard")]
+
+
+def test_keyboard_held_key_sends_command_once(keyboard, monkeypatch):
+    handler, commands = keyboard
+    press(monkeypatch, pygame.K_w)
+    for _ in range(5):
+        handler.update()
+    assert commands == [("altitude_setpoint_ft", 50.0, "keyboard")]
+
+
+def test_keyboard_repeated_key_press(keyboard, monkeypatch):
+    handler, commands = keyboard
+    for keys in [(pygame.K_a,), (), (pygame.K_a,), (pygame.K_a, pygame.K_d)]:
+        press(monkeypatch, *keys)
+        handler.update()
+    assert commands == [
+        ("heading_setpoint_deg", -5.0, "keyboard"),
+        ("heading_setpoint_deg", -5.0, "keyboard"),
+        ("heading_setpoint_deg", 5.0, "keyboard"),
+    ]
+
+
+def test_keyboard_ignores_unmapped_and_released_keys(keyboard, monkeypatch):
+    handler, commands = keyboard
+    press(monkeypatch, pygame.K_SPACE)
+    handler.update()
+    press(monkeypatch)
+    handler.update()
+    assert commands == []
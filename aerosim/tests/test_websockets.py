@@ -0,0 +1,101 @@
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+
+from aerosim.io.websockets import image_server
+from aerosim.io.websockets.command_server import CommandQueue
+from aerosim.io.websockets.image_server import (
+    IMAGE_QUEUE_SIZE,
+    put_latest_image,
+    read_jpeg_size,
+)
+
+
+def command(name, value):
+    return {"command": name, "value": value, "source": "remote"}
+
+
+def test_command_queue_coalesces_axis_commands():
+    queue = CommandQueue()
+    queue.append(command("left_stick_x", 0.1))
+    queue.append(command("power_cmd", 0.02))
+    queue.append(command("left_stick_x", 0.2))
+    queue.append(command("left_stick_x", 0.3))
+    assert len(queue) == 2
+    # The axis command keeps its place in the queue with its latest value
+    assert queue.popleft() == command("left_stick_x", 0.3)
+    assert queue.popleft() == command("power_cmd", 0.02)
+
+
+def test_command_queue_keeps_every_increment_command():
+    queue = CommandQueue()
+    for _ in range(3):
+        queue.append(command("power_cmd", 0.02))
+    assert len(queue) == 3
+    assert [queue.popleft()["value"] for _ in range(3)] == [0.02, 0.02, 0.02]
+
+
+def test_command_queue_axis_stream_keeps_increment_commands():
+    queue = CommandQueue(maxlen=4)
+    queue.append(command("wheel_brake_cmd", 1.0))
+    for i in range(100):
+        queue.append(command("left_stick_y", i / 100))
+    assert len(queue) == 2
+    assert queue.popleft() == command("wheel_brake_cmd", 1.0)
+    assert queue.popleft() == command("left_stick_y", 0.99)
+
+
+def test_command_queue_drops_oldest_when_full():
+    queue = CommandQueue(maxlen=3)
+    for i in range(5):
+        queue.append(command("power_cmd", i))
+    assert len(queue) == 3
+    assert queue.popleft()["value"] == 2
+    assert queue.pop()["value"] == 4
+    assert queue.pop()["value"] == 3
+
+
+def test_command_queue_pop_empty():
+    queue = CommandQueue()
+    with pytest.raises(IndexError):
+        queue.popleft()
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_put_latest_image_keeps_only_latest(monkeypatch):
+    queue = asyncio.Queue(maxsize=IMAGE_QUEUE_SIZE)
+    monkeypatch.setattr(image_server, "image_queue", queue)
+    for frame in (b"frame1", b"frame2", b"frame3"):
+        put_latest_image(frame)
+    assert queue.qsize() == 1
+    assert queue.get_nowait() == b"frame3"
+
+
+def test_read_jpeg_size_encoded_image():
+    _, buffer = cv2.imencode(".jpg", np.zeros((30, 40, 3), dtype=np.uint8))
+    assert read_jpeg_size(buffer.tobytes()) == (30, 40)
+
+
+def test_read_jpeg_size_skips_segments_before_frame_header():
+    app0 = b"\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    # Huffman table segment, whose marker is in the SOFn range but isn't a frame header
+    dht = b"\xff\xc4\x00\x04\x00\x00"
+    sof0 = b"\xff\xc0\x00\x11\x08\x01\xe0\x02\x80\x03" + bytes(9)
+    data = b"\xff\xd8" + app0 + dht + b"\xff" + sof0 + b"\xff\xd9"
+    assert read_jpeg_size(data) == (480, 640)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\x89PNG\r\n\x1a\n" + bytes(32),
+        b"\xff\xd8\xff\xd9" + bytes(16),
+        b"\xff\xd8\xff\xe0\x00\x10",
+    ],
+)
+def test_read_jpeg_size_invalid(data):
+    assert read_jpeg_size(data) is None
@@ -4,29 +4,39 @@
 This script ensures proper sequencing of dependencies and compilation across the project.
 """
 
+import io
 import os
 import subprocess
 import sys
 import argparse
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_command(cmd, cwd=None, verbose=False):
-    """Run a command and return its output."""
-    print(f"Running: {' '.join(cmd if isinstance(cmd, list) else [cmd])}")
+def run_command(cmd, cwd=None, verbose=False, output=None):
+    """Run a command and return its output.
+
+    Messages are written to output (stdout by default). In verbose mode the command's
+    output is streamed live to stdout, or written to output once it exits if given.
+    """
+    print(f"Running: {' '.join(cmd if isinstance(cmd, list) else [cmd])}", file=output)
     try:
         if verbose:
             # Run with live output for verbose mode
             process = subprocess.Popen(
                 cmd,
                 cwd=cwd,
+                stdout=None if output is None else subprocess.PIPE,
+                stderr=None if output is None else subprocess.STDOUT,
                 text=True,
                 encoding='utf-8',
                 errors='replace'
             )
-            process.communicate()
+            stdout, _ = process.communicate()
+            if stdout:
+                print(stdout, end="", file=output)
             if process.returncode != 0:
-                print(f"Command failed with return code {process.returncode}")
+                print(f"Command failed with return code {process.returncode}", file=output)
                 sys.exit(1)
             return ""
         else:
@@ -42,32 +52,22 @@ def run_command(cmd, cwd=None, verbose=False):
             )
             return result.stdout
     except subprocess.CalledProcessError as e:
-        print(f"Error running command: {e}")
-        print(f"STDOUT: {e.stdout}")
-        print(f"STDERR: {e.stderr}")
+        print(f"Error running command: {e}", file=output)
+        print(f"STDOUT: {e.stdout}", file=output)
+        print(f"STDERR: {e.stderr}", file=output)
         sys.exit(1)
 
 def clean_build_artifacts(project_root, verbose=False):
     """Clean up build artifacts."""
     print("Cleaning build artifacts...")
     
-    # Clean Rust build artifacts
-    run_command(["cargo", "clean"], cwd=project_root, verbose=verbose)
-    
-    # Clean Python build artifacts
-    dist_dir = project_root / "dist"
-    if dist_dir.exists():
-        print(f"Removing {dist_dir}")
-        shutil.rmtree(dist_dir)
-    
-    # Clean aerosim-world-link artifacts
-    world_link_dir = project_root / "aerosim-world-link"
-    world_link_lib_dir = world_link_dir / "lib"
-    if world_link_lib_dir.exists():
-        print(f"Removing {world_link_lib_dir}")
-        shutil.rmtree(world_link_lib_dir)
+    # Python build artifacts and aerosim-world-link artifacts
+    dirs_to_remove = [
+        project_root / "dist",
+        project_root / "aerosim-world-link" / "lib",
+    ]
     
-    # Clean target directories in all packages
+    # Target directories in all packages
     packages = [
         "aerosim-controllers",
         "aerosim-core",
@@ -78,15 +78,63 @@ def clean_build_artifacts(project_root, verbose=False):
         "aerosim-world",
         "aerosim-world-link"
     ]
+    dirs_to_remove.extend(project_root / package / "target" for package in packages)
+    
+    dirs_to_remove = [path for path in dirs_to_remove if path.exists()]
+    for path in dirs_to_remove:
+        print(f"Removing {path}")
     
-    for package in packages:
-        package_target = project_root / package / "target"
-        if package_target.exists():
-            print(f"Removing {package_target}")
-            shutil.rmtree(package_target)
+    # Clean Rust build artifacts and remove the directories in parallel, deleting
+    # many small files one at a time is slow (especially on Windows)
+    with ThreadPoolExecutor() as executor:
+        cargo_clean = executor.submit(
+            run_command, ["cargo", "clean"], cwd=project_root, verbose=verbose
+        )
+        list(executor.map(shutil.rmtree, dirs_to_remove))
+        cargo_clean.result()
     
     print("Clean completed successfully!")
 
+def build_world_link(world_link_dir, verbose=False, output=None):
+    """Build the aerosim-world-link library, writing its messages to output."""
+    print("Building aerosim-world-link...", file=output)
+
+    # Ensure lib directory exists
+    (world_link_dir / "lib").mkdir(exist_ok=True)
+
+    # Always build aerosim-world-link regardless of existing files
+    if sys.platform == "win32":
+        bat_file = world_link_dir / "build.bat"
+        if bat_file.exists():
+            print(f"Running batch file: {bat_file}", file=output)
+            run_command(f"cmd /c {bat_file}", cwd=world_link_dir, verbose=verbose, output=output)
+        else:
+            print(f"Warning: build.bat not found at {bat_file}", file=output)
+            print("Files in directory:", file=output)
+            for file in world_link_dir.iterdir():
+                print(f"  {file}", file=output)
+    else:
+        # Make the script executable
+        shell_file = world_link_dir / "build.sh"
+        if shell_file.exists():
+            run_command(["chmod", "+x", str(shell_file)], cwd=world_link_dir, verbose=verbose, output=output)
+            run_command(["./build.sh"], cwd=world_link_dir, verbose=verbose, output=output)
+        else:
+            print(f"Warning: build.sh not found at {shell_file}", file=output)
+            print("Files in directory:", file=output)
+            for file in world_link_dir.iterdir():
+                print(f"  {file}", file=output)
+
+def finish_background_build(build, output):
+    """Wait for a build running in the background and print its buffered output.
+
+    Exits if the build failed.
+    """
+    try:
+        build.result()
+    finally:
+        print(output.getvalue(), end="")
+
 def main():
     """Main build function."""
     # Parse command line arguments
@@ -116,6 +164,17 @@ def main():
         print("Setting up Rye virtual environment...")
         run_command(["rye", "sync"], cwd=project_root, verbose=args.verbose)
     
+    # Build aerosim-world-link in the background while the crates are built. It's a
+    # separate cargo project with its own target directory, so the two builds don't
+    # wait on each other's build directory lock. Its output is buffered and printed
+    # once it finishes, so that it doesn't interleave with the crate builds.
+    executor = ThreadPoolExecutor(max_workers=1)
+    world_link_output = io.StringIO()
+    world_link_build = executor.submit(
+        build_world_link, project_root / "aerosim-world-link", args.verbose, world_link_output
+    )
+    world_link_finished = False
+
     # Step 2: Build all Rust crates using maturin
     print("Building Rust crates with maturin...")
     
@@ -154,6 +213,11 @@ def main():
     if not skip_builds:
         total_packages = len(packages)
         for i, package in enumerate(packages):
+            # Stop as soon as the aerosim-world-link build has failed, rather than
+            # after all the crates are built
+            if not world_link_finished and world_link_build.done():
+                finish_background_build(world_link_build, world_link_output)
+                world_link_finished = True
             print(f"Building package {i+1}/{total_packages} {package}...")
             package_path = project_root / package / "Cargo.toml"
             if package_path.exists():
@@ -166,35 +230,10 @@ def main():
     else:
         print("Skipping package builds as wheels already exist (use --force or -f to force rebuild)")
 
-    # Step 3: Build aerosim-world-link explicitly
-    world_link_dir = project_root / "aerosim-world-link"
-    print("Building aerosim-world-link...")
-
-    # Ensure lib directory exists
-    (world_link_dir / "lib").mkdir(exist_ok=True)
-
-    # Always build aerosim-world-link regardless of existing files
-    if sys.platform == "win32":
-        bat_file = world_link_dir / "build.bat"
-        if bat_file.exists():
-            print(f"Running batch file: {bat_file}")
-            run_command(f"cmd /c {bat_file}", cwd=world_link_dir, verbose=args.verbose)
-        else:
-            print(f"Warning: build.bat not found at {bat_file}")
-            print("Files in directory:")
-            for file in world_link_dir.iterdir():
-                print(f"  {file}")
-    else:
-        # Make the script executable
-        shell_file = world_link_dir / "build.sh"
-        if shell_file.exists():
-            run_command(["chmod", "+x", str(shell_file)], cwd=world_link_dir, verbose=args.verbose)
-            run_command(["./build.sh"], cwd=world_link_dir, verbose=args.verbose)
-        else:
-            print(f"Warning: build.sh not found at {shell_file}")
-            print("Files in directory:")
-            for file in world_link_dir.iterdir():
-                print(f"  {file}")
+    # Step 3: Wait for the aerosim-world-link build started before the crates
+    if not world_link_finished:
+        finish_background_build(world_link_build, world_link_output)
+    executor.shutdown()
 
     # Step 4: Additional Python package setup if needed
     print("Installing additional Python dependencies...")
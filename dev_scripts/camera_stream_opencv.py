@@ -5,7 +5,8 @@ import cv2
 import numpy as np
 from collections import deque
 
-image_queue = deque(maxlen=1)
+# Only the latest JPEG is kept, and it's decoded just before being displayed
+jpeg_queue = deque(maxlen=1)
 serializer = middleware.BincodeSerializer()
 
 cv2.namedWindow("Camera Preview")
@@ -15,10 +16,7 @@ def on_sensor_data(payload):
 
     _, data = serializer.deserialize_message(aerosim_types.CompressedImage, payload)
 
-    # Convert bytes to NumPy array
-    image_array = np.frombuffer(data.data, dtype=np.uint8)
-
-    image_queue.append(cv2.imdecode(image_array, cv2.IMREAD_COLOR))
+    jpeg_queue.append(data.data)
 
 
 # Set up middleware transport and subscribe to vehicle state
@@ -28,9 +26,12 @@ transport.subscribe_raw(
 )
 
 while True:
-    if image_queue:
+    if jpeg_queue:
+
+        # Convert bytes to NumPy array
+        image_array = np.frombuffer(jpeg_queue.pop(), dtype=np.uint8)
 
-        image_rgb = image_queue.pop()
+        image_rgb = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
         cv2.imshow("Camera Preview", image_rgb)
 
     # Exit when pressing ESC
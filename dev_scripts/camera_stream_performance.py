@@ -5,6 +5,8 @@ import collections
 import time
 import statistics
 
+import numpy as np
+
 """
 This script measures image metrics such as rate, latency, and compression.  
 By default, it processes 1000 images, but you can stop it anytime with Ctrl+C.  
@@ -15,11 +17,14 @@ serializer = middleware.BincodeSerializer()
 
 TOTAL_IMAGES = 1000
 
+# Size of an uncompressed 1920x1080 BGRA frame in bytes
+FRAME_BYTES = 4 * 1920 * 1080
+
 # Images received per second (starting from the first received image).
 timestamps = collections.defaultdict(int)
 
-latencies = []
-compression = []
+latencies = np.empty(TOTAL_IMAGES)
+compression = np.empty(TOTAL_IMAGES)
 
 start_timestamp = 0
 images_received = 0
@@ -43,14 +48,16 @@ def on_sensor_data(payload):
     if images_received == 0:
         start_timestamp = timestamp_received
 
-    timestamps[int((timestamp_received - start_timestamp) / 1000.0)] += 1
-    latencies.append(latency)
-    compression.append((4 * 1920 * 1080) / len(data.data))
+    timestamps[(timestamp_received - start_timestamp) // 1000] += 1
+    latencies[images_received] = latency
+    compression[images_received] = FRAME_BYTES / len(data.data)
 
     images_received += 1
 
 
 def report_statistics():
+    received_latencies = latencies[:images_received]
+    received_compression = compression[:images_received]
 
     # Discard images from the last second, as they may be incomplete.
     _ = timestamps.pop(max(timestamps))
@@ -64,15 +71,15 @@ def report_statistics():
         print(f"  -> Minimum: {min(rates):.2f} images/s")
         print(f"  -> Maximum: {max(rates):.2f} images/s")
 
-    if len(latencies) > 1:
+    if len(received_latencies) > 1:
         print("\nLatency Statistics:")
-        print(f"  -> Mean: {statistics.mean(latencies):.2f} ms")
-        print(f"  -> Variance: {statistics.variance(latencies):.2f}")
-        print(f"  -> Minimum: {min(latencies):.2f} ms")
-        print(f"  -> Maximum: {max(latencies):.2f} ms")
+        print(f"  -> Mean: {received_latencies.mean():.2f} ms")
+        print(f"  -> Variance: {received_latencies.var(ddof=1):.2f}")
+        print(f"  -> Minimum: {received_latencies.min():.2f} ms")
+        print(f"  -> Maximum: {received_latencies.max():.2f} ms")
 
-    if len(compression) > 1:
-        print(f"\nCompression: {statistics.mean(compression):.2f}")
+    if len(received_compression) > 1:
+        print(f"\nCompression: {received_compression.mean():.2f}")
 
 
 # Middleware transport